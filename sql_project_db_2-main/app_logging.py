@@ -0,0 +1,99 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+
+# LogRecord attributes that are not user-supplied fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class FieldsAdapter(logging.LoggerAdapter):
+    """Logger taking structured fields as keyword arguments.
+
+        log.info("Booking created", booking_id=7, room_id=3)
+
+    Fields travel on the LogRecord and are rendered by the formatter, so a call
+    below the active level costs one isEnabledFor() check.
+    """
+
+    def __init__(self, logger):
+        super().__init__(logger, {})
+
+    def process(self, msg, kwargs):
+        fields = {k: kwargs.pop(k) for k in list(kwargs)
+                  if k not in ("exc_info", "stack_info", "stacklevel", "extra")}
+        kwargs["extra"] = dict(kwargs.get("extra") or {}, **fields)
+        return msg, kwargs
+
+
+def record_fields(record):
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+
+class TextFormatter(logging.Formatter):
+    """``time LEVEL logger message key=value ...``"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v!r}" if isinstance(v, str) and " " in v else f"{k}={v}"
+                                   for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, fields at the top level"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_listener = None
+
+
+def setup_logging(level="INFO", fmt="text", log_file=None, logger_name="hotel"):
+    """Send ``logger_name`` records through a queue to a background writer thread.
+
+    Request threads only enqueue the record; formatting and the stdout/file write
+    happen on the QueueListener thread. Safe to call again to change settings.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    logger = logging.getLogger(logger_name)
+    logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    logger.propagate = False
+    return _listener
+
+
+def get_logger(name):
+    return FieldsAdapter(logging.getLogger(name))
+
+
+@atexit.register
+def _flush():
+    if _listener is not None:
+        _listener.stop()
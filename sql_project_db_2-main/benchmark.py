@@ -0,0 +1,355 @@
+"""HTTP benchmark for the main.py API.
+
+Builds a synthetic database once (generate_data.py), then drives the real
+endpoints and reports throughput and p50/p95/p99 latency per endpoint as JSON:
+
+    python benchmark.py --bookings 1000000 --output run.json
+    python benchmark.py --server --concurrency 8          # real threaded WSGI server
+    python benchmark.py --baseline baseline.json          # exit 1 on a regression
+
+A baseline recorded with a different mode, concurrency, request count or scale
+is refused (exit 2) unless --force-compare is given.
+
+Every run starts from a fresh copy of the generated database, so write endpoints
+see the same data each time. By default requests go through Flask's test client
+in this process; --server starts the app under werkzeug's threaded server in a
+child process and sends real HTTP requests with keep-alive sessions.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+from generate_data import generate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Any other status (and any exception) counts as an error
+WRITE_STATUSES = {200, 201, 400, 404, 409}
+READ_STATUSES = {200, 304}
+
+
+class Dataset:
+    """What the scenarios need to know about the generated database"""
+
+    def __init__(self, db_file):
+        conn = sqlite3.connect(db_file)
+        self.rooms = conn.execute("SELECT MAX(room_id) FROM rooms").fetchone()[0] or 1
+        self.users = conn.execute("SELECT MAX(user_id) FROM users").fetchone()[0] or 1
+        self.bookings = conn.execute("SELECT MAX(booking_id) FROM bookings").fetchone()[0] or 1
+        self.last_check_out = date.fromisoformat(
+            conn.execute("SELECT COALESCE(MAX(check_out), '2026-01-01') FROM bookings").fetchone()[0])
+        conn.close()
+
+
+def stay(rng, first_day, span_days):
+    check_in = first_day + timedelta(days=rng.randrange(span_days))
+    return check_in.isoformat(), (check_in + timedelta(days=rng.randint(1, 4))).isoformat()
+
+
+# name -> (statuses that count as success, rng, dataset -> (method, path, json body))
+SCENARIOS = {
+    "GET /rooms": (READ_STATUSES, lambda rng, d: ("GET", "/rooms", None)),
+    "GET /rooms/<id>": (READ_STATUSES, lambda rng, d: ("GET", f"/rooms/{rng.randint(1, d.rooms)}", None)),
+    "GET /rooms/available": (READ_STATUSES, lambda rng, d: (
+        "GET", "/rooms/available?check_in={}&check_out={}".format(*stay(rng, date(2026, 1, 1), 365)), None)),
+    "GET /bookings?limit=50": (READ_STATUSES, lambda rng, d: (
+        "GET", f"/bookings?limit=50&user_id={rng.randint(1, d.users)}", None)),
+    "GET /bookings/<id>": (READ_STATUSES, lambda rng, d: ("GET", f"/bookings/{rng.randint(1, d.bookings)}", None)),
+    "GET /users/<id>/bookings": (READ_STATUSES, lambda rng, d: (
+        "GET", f"/users/{rng.randint(1, d.users)}/bookings", None)),
+    "GET /users/<id>/summary": (READ_STATUSES, lambda rng, d: (
+        "GET", f"/users/{rng.randint(1, d.users)}/summary", None)),
+    "GET /payments?limit=50": (READ_STATUSES, lambda rng, d: ("GET", "/payments?limit=50", None)),
+    "GET /admin/stats": (READ_STATUSES, lambda rng, d: ("GET", "/admin/stats", None)),
+    "POST /bookings": (WRITE_STATUSES, lambda rng, d: ("POST", "/bookings", dict(zip(
+        ("check_in", "check_out"), stay(rng, d.last_check_out + timedelta(days=30), 3650)),
+        user_id=rng.randint(1, d.users), room_id=rng.randint(1, d.rooms)))),
+    "PUT /bookings/<id>": (WRITE_STATUSES, lambda rng, d: (
+        "PUT", f"/bookings/{rng.randint(1, d.bookings)}", {"arrival_status": rng.choice(["Arrived", "Not Arrived"])})),
+}
+
+
+class TestClientTarget:
+    """The app imported into this process, called through Flask's test client"""
+
+    name = "test_client"
+
+    def __init__(self, run_dir):
+        os.chdir(run_dir)
+        sys.path.insert(0, HERE)
+        import main
+        from app_logging import setup_logging
+        setup_logging("WARNING")
+        self.app = main.app
+
+    def client(self):
+        client = self.app.test_client()
+
+        def call(method, path, body):
+            response = client.open(path, method=method, json=body)
+            response.get_data()
+            response.close()
+            return response.status_code
+        return call
+
+    def close(self):
+        pass
+
+
+class ServerTarget:
+    """The app under werkzeug's threaded WSGI server in a child process"""
+
+    name = "wsgi_server"
+
+    def __init__(self, run_dir, port):
+        import requests
+        self._requests = requests
+        self.base_url = f"http://127.0.0.1:{port}"
+        code = ("import sys; sys.path.insert(0, {here!r}); import main; "
+                "from app_logging import setup_logging; setup_logging('WARNING'); "
+                "from werkzeug.serving import make_server; "
+                "make_server('127.0.0.1', {port}, main.app, threaded=True).serve_forever()").format(here=HERE, port=port)
+        self.process = subprocess.Popen([sys.executable, "-c", code], cwd=run_dir)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                requests.get(self.base_url + "/health", timeout=1)
+                break
+            except requests.ConnectionError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError("benchmark server did not start")
+                time.sleep(0.1)
+
+    def client(self):
+        session = self._requests.Session()
+
+        def call(method, path, body):
+            return session.request(method, self.base_url + path, json=body, timeout=30).status_code
+        return call
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run_scenario(target, scenario, dataset, requests, concurrency, warmup, seed):
+    ok_statuses, make_request = SCENARIOS[scenario]
+    latencies = []
+    statuses = {}
+    errors = [0]
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker(worker_id):
+        call = target.client()
+        rng = random.Random(f"{seed}-{scenario}-{worker_id}")
+        for _ in range(warmup // concurrency):
+            call(*make_request(rng, dataset))
+        ready.wait()  # the clock starts once every worker has warmed up
+        mine = []
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            method, path, body = make_request(rng, dataset)
+            started = time.perf_counter()
+            try:
+                status = call(method, path, body)
+            except Exception:
+                status = "exception"
+            mine.append(time.perf_counter() - started)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status not in ok_statuses:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(mine)
+
+    ready = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(ms),
+        "errors": errors[0],
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "throughput_rps": round(len(ms) / wall, 1) if wall else None,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else None,
+        "p50_ms": round(percentile(ms, 50), 3) if ms else None,
+        "p95_ms": round(percentile(ms, 95), 3) if ms else None,
+        "p99_ms": round(percentile(ms, 99), 3) if ms else None,
+        "max_ms": round(ms[-1], 3) if ms else None,
+    }
+
+
+# Runs that differ in any of these measure different things; their numbers are not comparable
+COMPARABLE_META = ("mode", "concurrency", "requests_per_endpoint", "scale")
+
+
+def meta_mismatches(results, baseline):
+    """(key, baseline value, current value) for every COMPARABLE_META key that differs"""
+    base = baseline.get("meta", {})
+    return [(key, base.get(key), results["meta"][key])
+            for key in COMPARABLE_META if base.get(key) != results["meta"][key]]
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Endpoints whose p95 grew, or throughput fell, by more than ``threshold`` (a fraction)"""
+    regressions = []
+    for scenario, current in results["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(scenario)
+        if not base or base.get("p95_ms") is None or current.get("p95_ms") is None:
+            continue
+        if (current["p95_ms"] > base["p95_ms"] * (1 + threshold)
+                and current["p95_ms"] - base["p95_ms"] >= min_delta_ms):
+            regressions.append({"endpoint": scenario, "metric": "p95_ms",
+                                "baseline": base["p95_ms"], "current": current["p95_ms"]})
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append({"endpoint": scenario, "metric": "throughput_rps",
+                                "baseline": base["throughput_rps"], "current": current["throughput_rps"]})
+        if current["errors"] > base["errors"]:
+            regressions.append({"endpoint": scenario, "metric": "errors",
+                                "baseline": base["errors"], "current": current["errors"]})
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_database(args):
+    """Generated database for this scale (built once), copied to a fresh run directory"""
+    os.makedirs(args.workdir, exist_ok=True)
+    name = f"rooms{args.rooms}-users{args.users}-bookings{args.bookings}-seed{args.seed}.db"
+    pristine = os.path.join(args.workdir, name)
+    if args.rebuild and os.path.exists(pristine):
+        os.remove(pristine)
+    if not os.path.exists(pristine):
+        print(f"Generating {name} ...", file=sys.stderr)
+        generate(pristine + ".tmp", args.rooms, args.users, args.bookings, args.seed, replace=True,
+                 log=lambda line: print("  " + line, file=sys.stderr))
+        os.replace(pristine + ".tmp", pristine)
+
+    run_dir = os.path.abspath(os.path.join(args.workdir, "run"))
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+    shutil.copyfile(pristine, os.path.join(run_dir, "hotel_booking.db"))
+    return run_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hotel booking API")
+    parser.add_argument("--workdir", default="bench", help="where generated databases and the run copy live")
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the database even if it exists")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per endpoint first")
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads")
+    parser.add_argument("--server", action="store_true", help="use a real threaded WSGI server")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--only", action="append", help="run scenarios containing this text (repeatable)")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed fractional slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore p95 changes smaller than this")
+    parser.add_argument("--force-compare", action="store_true",
+                        help="compare against a baseline recorded with a different mode, concurrency or scale")
+    args = parser.parse_args()
+    # The in-process target changes directory to the run copy
+    args.output = args.output and os.path.abspath(args.output)
+    args.baseline = args.baseline and os.path.abspath(args.baseline)
+
+    scenarios = [s for s in SCENARIOS if not args.only or any(o in s for o in args.only)]
+    run_dir = prepare_database(args)
+    dataset = Dataset(os.path.join(run_dir, "hotel_booking.db"))
+    target = ServerTarget(run_dir, args.port) if args.server else TestClientTarget(run_dir)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "mode": target.name,
+            "concurrency": args.concurrency,
+            "requests_per_endpoint": args.requests,
+            "scale": {"rooms": args.rooms, "users": args.users, "bookings": args.bookings, "seed": args.seed},
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "endpoints": {},
+    }
+
+    # Check the baseline before spending time on the run
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = meta_mismatches(results, baseline)
+        for key, base_value, value in mismatches:
+            print(f"BASELINE MISMATCH {key}: {json.dumps(base_value)} -> {json.dumps(value)}", file=sys.stderr)
+        if mismatches and not args.force_compare:
+            target.close()
+            print("Refusing to compare runs with different settings (--force-compare to override)", file=sys.stderr)
+            return 2
+
+    try:
+        for scenario in scenarios:
+            stats = run_scenario(target, scenario, dataset, args.requests, args.concurrency, args.warmup, args.seed)
+            results["endpoints"][scenario] = stats
+            print(f"{scenario:28} {stats['throughput_rps']:>9} req/s  p50 {stats['p50_ms']:>8} ms  "
+                  f"p95 {stats['p95_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms  errors {stats['errors']}",
+                  file=sys.stderr)
+    finally:
+        target.close()
+
+    exit_code = 0
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        results["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION {r['endpoint']}: {r['metric']} {r['baseline']} -> {r['current']}", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import bisect
+import threading
+
+
+class _RoomIntervals:
+    """Active bookings of one room, sorted by check_in.
+
+    ``max_end[i]`` is the latest check_out among entries ``0..i``, which lets a
+    lookup stop walking left as soon as no earlier booking can reach the stay.
+    """
+
+    def __init__(self, entries):
+        self.entries = sorted(entries)
+        self._rebuild()
+
+    def _rebuild(self):
+        self.starts = [e[0] for e in self.entries]
+        self.max_end = []
+        latest = None
+        for entry in self.entries:
+            if latest is None or entry[1] > latest:
+                latest = entry[1]
+            self.max_end.append(latest)
+
+    def add(self, entry):
+        bisect.insort(self.entries, entry)
+        self._rebuild()
+
+    def remove(self, booking_id):
+        self.entries = [e for e in self.entries if e[2] != booking_id]
+        self._rebuild()
+
+    def overlapping(self, check_in, check_out, exclude_booking_id=None):
+        # Every candidate starts before check_out; walk left while one could still end after check_in
+        found = []
+        i = bisect.bisect_left(self.starts, check_out) - 1
+        while i >= 0 and self.max_end[i] > check_in:
+            start, end, booking_id, status = self.entries[i]
+            if end > check_in and booking_id != exclude_booking_id:
+                found.append((booking_id, status, start, end))
+            i -= 1
+        found.reverse()
+        return found
+
+
+class BookingIntervalIndex:
+    """In-process index of active (non-cancelled) bookings per room.
+
+    Rooms are loaded from the bookings table on first lookup. Write handlers keep
+    loaded rooms in sync through add(), discard() and sync_booking(), so a conflict
+    check is a binary search instead of a query.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rooms = {}
+        self._booking_rooms = {}
+
+    def _load_room(self, db, room_id):
+        rows = db.execute("""
+            SELECT check_in, check_out, booking_id, booking_status FROM bookings
+            WHERE room_id = ? AND booking_status != 'Cancelled'
+        """, (room_id,)).fetchall()
+        room = _RoomIntervals([tuple(r) for r in rows])
+        self._rooms[room_id] = room
+        for row in rows:
+            self._booking_rooms[row[2]] = room_id
+        return room
+
+    def _room(self, db, room_id):
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = self._load_room(db, room_id)
+        return room
+
+    def overlapping(self, db, room_id, check_in, check_out, exclude_booking_id=None):
+        """Active bookings of room_id overlapping [check_in, check_out), as
+        (booking_id, booking_status, check_in, check_out) tuples"""
+        room_id = int(room_id)
+        with self._lock:
+            return self._room(db, room_id).overlapping(check_in, check_out, exclude_booking_id)
+
+    def add(self, booking_id, room_id, check_in, check_out, booking_status="Pending"):
+        """Record a newly written active booking (no-op for rooms not loaded yet)"""
+        if booking_status == "Cancelled":
+            return
+        room_id = int(room_id)
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                return
+            if self._booking_rooms.get(booking_id) == room_id:
+                room.remove(booking_id)
+            room.add((check_in, check_out, booking_id, booking_status))
+            self._booking_rooms[booking_id] = room_id
+
+    def discard(self, booking_id):
+        """Forget a cancelled or deleted booking"""
+        with self._lock:
+            room_id = self._booking_rooms.pop(booking_id, None)
+            if room_id is not None and room_id in self._rooms:
+                self._rooms[room_id].remove(booking_id)
+
+    def sync_booking(self, db, booking_id):
+        """Re-read one booking by primary key after its row was updated"""
+        row = db.execute(
+            "SELECT room_id, check_in, check_out, booking_status FROM bookings WHERE booking_id=?",
+            (booking_id,)
+        ).fetchone()
+        with self._lock:
+            self.discard(booking_id)
+            if row:
+                self.add(booking_id, row[0], row[1], row[2], row[3])
+
+    def invalidate(self, room_id=None):
+        """Drop one room (or everything); it is reloaded on the next lookup"""
+        with self._lock:
+            if room_id is None:
+                self._rooms.clear()
+                self._booking_rooms.clear()
+                return
+            room = self._rooms.pop(room_id, None)
+            if room:
+                for entry in room.entries:
+                    self._booking_rooms.pop(entry[2], None)
+
+    def verify(self, db):
+        """Compare every loaded room against the bookings table; returns the room_ids that differ"""
+        with self._lock:
+            mismatched = []
+            for room_id, room in self._rooms.items():
+                rows = db.execute("""
+                    SELECT check_in, check_out, booking_id, booking_status FROM bookings
+                    WHERE room_id = ? AND booking_status != 'Cancelled'
+                """, (room_id,)).fetchall()
+                if sorted(tuple(r) for r in rows) != room.entries:
+                    mismatched.append(room_id)
+            return mismatched
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rooms_loaded": len(self._rooms),
+                "bookings_indexed": sum(len(r.entries) for r in self._rooms.values()),
+            }
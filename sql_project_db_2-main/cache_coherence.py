@@ -0,0 +1,102 @@
+import contextlib
+import threading
+
+
+class CacheCoherence:
+    """Keeps in-process caches correct when several worker processes share one database.
+
+    Every cached table has a row in table_versions that triggers bump on each write.
+    check() runs once per request: if PRAGMA data_version and total_changes of the
+    request's connection are unchanged since that connection last looked, nothing was
+    committed anywhere and the check costs one PRAGMA. Otherwise it reads
+    table_versions and fires the invalidation callbacks of only the tables whose
+    version moved.
+
+    Writes made through tracked_write() record their own version bumps, so a worker
+    does not throw away caches it has already updated itself.
+    """
+
+    def __init__(self, tables, begin=None):
+        self.tables = list(tables)
+        self._begin = begin or (lambda db: db.execute("BEGIN IMMEDIATE"))
+        self._lock = threading.Lock()
+        self._known = {}
+        self._callbacks = {table: [] for table in self.tables}
+        self._stats = {"checks": 0, "fast_path": 0, "invalidations": 0}
+
+    def register(self, table, callback):
+        """Call callback() whenever another connection changes table"""
+        self._callbacks[table].append(callback)
+
+    def _read_versions(self, db, tables=None):
+        tables = self.tables if tables is None else tables
+        if not tables:
+            return {}
+        placeholders = ", ".join("?" for _ in tables)
+        rows = db.execute(
+            f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+            tables
+        ).fetchall()
+        versions = {t: 0 for t in tables}
+        versions.update((r[0], r[1]) for r in rows)
+        return versions
+
+    def _apply(self, versions):
+        fired = []
+        with self._lock:
+            for table, version in versions.items():
+                if table in self._known and self._known[table] != version:
+                    fired.append(table)
+                self._known[table] = version
+            self._stats["invalidations"] += len(fired)
+        for table in fired:
+            for callback in self._callbacks.get(table, []):
+                callback()
+        return fired
+
+    def check(self, db):
+        """Bring caches up to date for this request; returns the tables invalidated"""
+        data_version = db.execute("PRAGMA data_version").fetchone()[0]
+        changes = db.total_changes
+        with self._lock:
+            self._stats["checks"] += 1
+            if (data_version == db.data_version_seen and changes == db.changes_seen
+                    and len(self._known) == len(self.tables)):
+                self._stats["fast_path"] += 1
+                return []
+        fired = self._apply(self._read_versions(db))
+        db.data_version_seen = data_version
+        db.changes_seen = db.total_changes
+        return fired
+
+    def versions(self, tables):
+        """Versions as of the last check(), for ETags"""
+        with self._lock:
+            return [self._known.get(t, 0) for t in tables]
+
+    @contextlib.contextmanager
+    def tracked_write(self, db, *tables):
+        """BEGIN IMMEDIATE ... COMMIT that attributes its own version bumps to this worker.
+
+        Holding the write lock, the versions read before and after the body can only
+        differ by what the body wrote, so they are acknowledged instead of being
+        mistaken for another process's change.
+        """
+        self._begin(db)
+        try:
+            before = self._read_versions(db, list(tables))
+            self._apply(before)
+            yield db
+            after = self._read_versions(db, list(tables))
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        with self._lock:
+            for table in tables:
+                if self._known.get(table) == before[table]:
+                    self._known[table] = after[table]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, known_versions=dict(self._known))
@@ -0,0 +1,111 @@
+import threading
+import time
+
+# Kept in step with the PAYMENT CALLBACKS section of create_database.py
+CALLBACK_LEDGER_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS payment_callbacks (
+        callback_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        endpoint TEXT NOT NULL,
+        tran_id TEXT NOT NULL,
+        val_id TEXT NOT NULL DEFAULT '',
+        status_code INTEGER,
+        response TEXT,
+        created_at REAL NOT NULL
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_payment_callbacks_key ON payment_callbacks(endpoint, tran_id, val_id)",
+    "CREATE INDEX IF NOT EXISTS idx_payment_callbacks_created ON payment_callbacks(created_at)",
+]
+
+IN_PROGRESS = object()
+
+
+class CallbackLedger:
+    """Remembers the response given to each payment callback for ``ttl`` seconds.
+
+    A delivery is keyed by (endpoint, tran_id, val_id). The first one claims its key
+    with a row whose status_code is NULL, runs the handler and stores the response;
+    a duplicate finds the row with one lookup on the unique index and is answered
+    from it without touching bookings or payments. A claim left unfinished for
+    ``claim_timeout`` seconds (crashed worker) may be taken over. Rows older than
+    ``ttl`` are ignored and purged at most every ``purge_interval`` seconds.
+    """
+
+    def __init__(self, ttl=7 * 24 * 3600, claim_timeout=60, purge_interval=3600, begin=None):
+        self.ttl = ttl
+        self.claim_timeout = claim_timeout
+        self.purge_interval = purge_interval
+        self._begin = begin or (lambda db: db.execute("BEGIN IMMEDIATE"))
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._stats = {"first": 0, "replayed": 0, "in_progress": 0, "purged": 0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def lookup(self, db, endpoint, tran_id, val_id=""):
+        """(status_code, response) stored for this delivery, IN_PROGRESS, or None"""
+        now = time.time()
+        row = db.execute("""
+            SELECT status_code, response, created_at FROM payment_callbacks
+            WHERE endpoint = ? AND tran_id = ? AND val_id = ? AND created_at > ?
+        """, (endpoint, tran_id, val_id or "", now - self.ttl)).fetchone()
+        if row is None:
+            return None
+        if row[0] is None:
+            if row[2] < now - self.claim_timeout:
+                return None
+            self._count("in_progress")
+            return IN_PROGRESS
+        self._count("replayed")
+        return row[0], row[1]
+
+    def claim(self, db, endpoint, tran_id, val_id=""):
+        """Claim a delivery; returns None when claimed, else what lookup() would return"""
+        now = time.time()
+        self._begin(db)
+        try:
+            stored = self.lookup(db, endpoint, tran_id, val_id)
+            if stored is None:
+                # An expired row with the same key is taken over rather than duplicated
+                db.execute("""
+                    INSERT INTO payment_callbacks (endpoint, tran_id, val_id, status_code, response, created_at)
+                    VALUES (?, ?, ?, NULL, NULL, ?)
+                    ON CONFLICT(endpoint, tran_id, val_id) DO UPDATE SET
+                        status_code = NULL, response = NULL, created_at = excluded.created_at
+                """, (endpoint, tran_id, val_id or "", now))
+                self._purge_if_due(db, now)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        if stored is None:
+            self._count("first")
+        return stored
+
+    def complete(self, db, endpoint, tran_id, val_id, status_code, response):
+        with db:
+            db.execute("""
+                UPDATE payment_callbacks SET status_code = ?, response = ?
+                WHERE endpoint = ? AND tran_id = ? AND val_id = ?
+            """, (status_code, response, endpoint, tran_id, val_id or ""))
+
+    def release(self, db, endpoint, tran_id, val_id=""):
+        """Drop a claim whose handler failed, so the gateway's retry is processed again"""
+        with db:
+            db.execute("""
+                DELETE FROM payment_callbacks
+                WHERE endpoint = ? AND tran_id = ? AND val_id = ? AND status_code IS NULL
+            """, (endpoint, tran_id, val_id or ""))
+
+    def _purge_if_due(self, db, now):
+        with self._lock:
+            if now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        purged = db.execute("DELETE FROM payment_callbacks WHERE created_at <= ?", (now - self.ttl,)).rowcount
+        self._count("purged", purged)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
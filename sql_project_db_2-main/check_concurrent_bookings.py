@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Several worker processes, each with several threads, book the same few rooms for
+# overlapping dates through the real POST /bookings handler. Afterwards no two active
+# bookings of a room may overlap. Runs against a copy of hotel_booking.db.
+PROCESSES = 4
+THREADS = 8
+REQUESTS_PER_THREAD = 40
+ROOMS = 3
+DAYS = 30  # every stay starts within this window, so most requests collide
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def worker(workdir, room_ids, user_id, seed, results):
+    os.chdir(workdir)
+    sys.path.insert(0, HERE)
+    import main
+    from app_logging import setup_logging
+    setup_logging("WARNING")  # handlers log every request to stderr
+    statuses = {}
+    lock = threading.Lock()
+
+    def run(thread_seed):
+        rng = random.Random(thread_seed)
+        client = main.app.test_client()
+        for _ in range(REQUESTS_PER_THREAD):
+            start = rng.randrange(DAYS)
+            nights = rng.randint(1, 4)
+            response = client.post("/bookings", json={
+                "user_id": user_id,
+                "room_id": rng.choice(room_ids),
+                "check_in": f"2031-01-{1 + start:02d}",
+                "check_out": f"2031-{1 + (start + nights) // 31:02d}-{1 + (start + nights) % 31:02d}",
+            })
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=run, args=(seed * 100 + i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put(statuses)
+
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp(prefix="booking-stress-")
+    shutil.copy(os.path.join(HERE, "hotel_booking.db"), workdir)
+    db_file = os.path.join(workdir, "hotel_booking.db")
+
+    conn = sqlite3.connect(db_file)
+    room_ids = [r[0] for r in conn.execute("SELECT room_id FROM rooms ORDER BY room_id LIMIT ?", (ROOMS,))]
+    user_id = conn.execute("SELECT MIN(user_id) FROM users").fetchone()[0]
+    conn.execute("UPDATE system_settings SET setting_value='true' WHERE setting_key='booking_enabled'")
+    conn.execute("UPDATE system_settings SET setting_value='false' WHERE setting_key='maintenance_mode'")
+    conn.commit()
+    conn.close()
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(workdir, room_ids, user_id, seed, results))
+                 for seed in range(PROCESSES)]
+    started = time.perf_counter()
+    for p in processes:
+        p.start()
+    statuses = {}
+    for _ in processes:
+        for code, count in results.get().items():
+            statuses[code] = statuses.get(code, 0) + count
+    for p in processes:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    conn = sqlite3.connect(db_file)
+    placeholders = ", ".join("?" for _ in room_ids)
+    double_bookings = conn.execute(f"""
+        SELECT a.booking_id, b.booking_id, a.room_id, a.check_in, a.check_out, b.check_in, b.check_out
+        FROM bookings a JOIN bookings b
+          ON a.room_id = b.room_id AND a.booking_id < b.booking_id
+        WHERE a.room_id IN ({placeholders})
+        AND a.booking_status != 'Cancelled' AND b.booking_status != 'Cancelled'
+        AND a.check_in < b.check_out AND a.check_out > b.check_in
+    """, room_ids).fetchall()
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    total = sum(statuses.values())
+    print(f"📌 {total} requests from {PROCESSES} processes x {THREADS} threads in {elapsed:.1f}s "
+          f"({total / elapsed:.0f} req/s)")
+    print(f"- status codes: {dict(sorted(statuses.items()))}")
+    for row in double_bookings:
+        print("-", row)
+    assert not double_bookings, f"{len(double_bookings)} overlapping active bookings"
+    assert set(statuses) <= {201, 400}, "requests failed with something other than a booking conflict"
+    print("\n✅ No double bookings under concurrent writers")
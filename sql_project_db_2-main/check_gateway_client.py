@@ -0,0 +1,101 @@
+import time
+
+from fake_gateway import start_fake_gateway
+from sslcommerz_client import SSLCommerzClient, CircuitBreaker, GatewayUnavailable
+
+# Exercises SSLCommerzClient against the local fake gateway: connection reuse,
+# timeouts, status retries and the circuit breaker.
+
+server, url = start_fake_gateway()
+
+print("📌 Keep-alive:")
+client = SSLCommerzClient(url, "store", "secret")
+for i in range(20):
+    assert client.transaction_status(f"BK_{i}")["status"] == "VALID"
+session = client.initiate_session({"tran_id": "BK_1_1", "total_amount": 100})
+assert session["status"] == "SUCCESS" and session["GatewayPageURL"]
+print(f"- 21 calls over {server.stats['connections']} connection(s)")
+assert server.stats["connections"] == 1, "session does not reuse its connection"
+
+print("\n📌 Read timeout:")
+server.latency = 0.5
+client = SSLCommerzClient(url, "store", "secret", read_timeout=0.1, status_retries=0)
+started = time.perf_counter()
+try:
+    client.transaction_status("BK_slow")
+    raise AssertionError("slow gateway did not time out")
+except GatewayUnavailable as e:
+    elapsed = time.perf_counter() - started
+    print(f"- gave up after {elapsed:.2f}s: {e}")
+assert elapsed < 0.4
+server.latency = 0
+
+print("\n📌 Status retries:")
+server.fail_rate = 1.0
+client = SSLCommerzClient(url, "store", "secret", status_retries=2, retry_backoff=0.01)
+before = server.stats["requests"]
+try:
+    client.transaction_status("BK_down")
+    raise AssertionError("503 was not reported")
+except GatewayUnavailable:
+    pass
+print(f"- status lookup: {server.stats['requests'] - before} attempts")
+assert server.stats["requests"] - before == 3
+before = server.stats["requests"]
+try:
+    client.initiate_session({"tran_id": "BK_down"})
+except GatewayUnavailable:
+    pass
+print(f"- session initiation: {server.stats['requests'] - before} attempt (never retried)")
+assert server.stats["requests"] - before == 1
+
+print("\n📌 Circuit breaker:")
+client = SSLCommerzClient(url, "store", "secret", status_retries=0,
+                          breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.2))
+for _ in range(3):
+    try:
+        client.transaction_status("BK_down")
+    except GatewayUnavailable:
+        pass
+assert client.breaker.state == "open"
+before = server.stats["requests"]
+started = time.perf_counter()
+try:
+    client.transaction_status("BK_down")
+except GatewayUnavailable as e:
+    print(f"- rejected in {(time.perf_counter() - started) * 1000:.2f}ms without a request: {e}")
+assert server.stats["requests"] == before
+
+server.fail_rate = 0
+time.sleep(0.25)
+assert client.breaker.state == "half_open"
+assert client.transaction_status("BK_ok")["status"] == "VALID"
+assert client.breaker.state == "closed"
+print(f"- probe succeeded, breaker closed: {client.breaker.stats()}")
+
+print("\n📌 Probe failing unexpectedly:")
+client = SSLCommerzClient(url, "store", "secret", status_retries=0,
+                          breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.1))
+server.fail_rate = 1.0
+try:
+    client.transaction_status("BK_down")
+except GatewayUnavailable:
+    pass
+server.fail_rate = 0
+time.sleep(0.15)
+working_post = client.session.post
+client.session.post = lambda *args, **kwargs: 1 / 0
+try:
+    client.transaction_status("BK_probe")
+    raise AssertionError("probe error was swallowed")
+except ZeroDivisionError:
+    pass
+assert client.breaker.state == "open"
+client.session.post = working_post
+time.sleep(0.15)
+assert client.breaker.state == "half_open", "breaker stuck open after a crashed probe"
+assert client.transaction_status("BK_ok")["status"] == "VALID"
+print(f"- crashed probe counted as a failure, next probe closed the breaker: {client.breaker.stats()}")
+
+server.shutdown()
+print("\n✅ Gateway client reuses connections, times out, retries and fails fast")
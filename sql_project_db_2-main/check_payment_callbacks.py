@@ -0,0 +1,198 @@
+import contextlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Payment events, the callback ledger and the hold sweeper, checked against a copy of
+# hotel_booking.db: transition guards, reinstating a cancelled booking only while
+# nothing overlaps it, a completed payment never being overwritten, replayed and
+# taken-over callbacks, and sweeping stale holds in batches.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STAY = ("2041-03-01", "2041-03-05")
+
+workdir = tempfile.mkdtemp(prefix="payment-check-")
+shutil.copy(os.path.join(HERE, "hotel_booking.db"), workdir)
+os.chdir(workdir)
+sys.path.insert(0, HERE)
+
+import main  # runs the startup migrations on the copy
+from app_logging import setup_logging
+from callback_ledger import CallbackLedger, IN_PROGRESS
+from hold_sweeper import HoldSweeper
+from payment_state import apply_payment_event, BookingNotFound
+
+setup_logging("WARNING")
+
+conn = sqlite3.connect(main.DB_FILE, isolation_level=None)
+user_id = conn.execute("SELECT user_id FROM users ORDER BY user_id LIMIT 1").fetchone()[0]
+room_id = conn.execute("SELECT room_id FROM rooms ORDER BY room_id LIMIT 1").fetchone()[0]
+
+
+@contextlib.contextmanager
+def transaction():
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def new_booking(status="Pending", stay=STAY, created_at=None):
+    return conn.execute(
+        "INSERT INTO bookings (user_id, room_id, check_in, check_out, booking_status, created_at) "
+        "VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP)) RETURNING booking_id",
+        (user_id, room_id, stay[0], stay[1], status, created_at)
+    ).fetchone()[0]
+
+
+def apply(booking_id, event, **payment):
+    with transaction():
+        return apply_payment_event(conn, booking_id, event, **payment)
+
+
+def booking_status(booking_id):
+    return conn.execute("SELECT booking_status FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()[0]
+
+
+def payment(booking_id):
+    return conn.execute("SELECT payment_status, amount, failure_reason FROM payments WHERE booking_id=?",
+                        (booking_id,)).fetchone()
+
+
+conn.execute("UPDATE bookings SET booking_status='Cancelled' WHERE room_id=? AND check_in < ? AND check_out > ?",
+             (room_id, STAY[1], STAY[0]))
+
+print("📌 Payment transitions:")
+paid = new_booking()
+outcome = apply(paid, "completed", amount=500, transaction_id="T-paid")
+assert outcome.booking_status == "Confirmed" and outcome.booking_changed and outcome.payment_recorded
+assert payment(paid) == ("Completed", 500, None)
+print("- completed: Pending -> Confirmed")
+
+outcome = apply(paid, "failed", amount=1, failure_reason="late decline")
+assert not outcome.booking_changed and not outcome.payment_recorded, outcome
+assert booking_status(paid) == "Confirmed" and payment(paid) == ("Completed", 500, None)
+apply(paid, "cancelled")
+assert booking_status(paid) == "Confirmed" and payment(paid)[0] == "Completed"
+print("- failed/cancelled after payment: booking and Completed payment untouched")
+
+declined = new_booking(stay=("2041-04-01", "2041-04-03"))
+outcome = apply(declined, "failed", amount=300, failure_reason="card declined")
+assert outcome.booking_status == "Cancelled" and outcome.booking_changed
+assert payment(declined) == ("Failed", 300, "card declined")
+print("- failed: Pending -> Cancelled, payment Failed with its reason")
+
+outcome = apply(declined, "completed", amount=300, transaction_id="T-late")
+assert outcome.booking_status == "Confirmed" and outcome.booking_changed
+assert payment(declined) == ("Completed", 300, None)
+print("- late completed: Cancelled -> Confirmed while the dates are still free")
+
+abandoned = new_booking(stay=("2041-05-01", "2041-05-04"))
+apply(abandoned, "cancelled")
+assert booking_status(abandoned) == "Cancelled"
+taker = new_booking(stay=("2041-05-03", "2041-05-06"))
+outcome = apply(abandoned, "completed", amount=200)
+assert outcome.booking_status == "Cancelled" and not outcome.booking_changed, outcome
+assert booking_status(taker) == "Pending"
+print("- late completed: stays Cancelled once another booking overlaps it")
+
+try:
+    apply(10 ** 9, "completed", amount=1)
+    raise AssertionError("missing booking was not reported")
+except BookingNotFound:
+    pass
+assert conn.execute("SELECT 1 FROM payments WHERE booking_id=?", (10 ** 9,)).fetchone() is None
+print("- unknown booking: BookingNotFound, nothing recorded")
+
+print("\n📌 Callback ledger:")
+ledger = CallbackLedger(ttl=60, claim_timeout=0.2, purge_interval=3600)
+key = ("ssl_payment_success", "T-ledger", "V-1")
+assert ledger.claim(conn, *key) is None
+assert ledger.lookup(conn, *key) is IN_PROGRESS
+assert ledger.claim(conn, *key) is IN_PROGRESS
+ledger.complete(conn, *key, 200, '{"status": "success"}')
+assert ledger.lookup(conn, *key) == (200, '{"status": "success"}')
+assert ledger.claim(conn, *key) == (200, '{"status": "success"}')
+print("- duplicate delivery: 409 while in progress, stored response once complete")
+
+assert ledger.claim(conn, "ssl_payment_success", "T-ledger", "V-2") is None
+print("- same tran_id with another val_id: a separate delivery")
+
+failing = ("ssl_payment_fail", "T-release", "")
+assert ledger.claim(conn, *failing) is None
+ledger.release(conn, *failing)
+assert ledger.claim(conn, *failing) is None
+print("- released claim: the retry is processed again")
+
+crashed = ("ssl_payment_success", "T-crashed", "")
+assert ledger.claim(conn, *crashed) is None
+time.sleep(0.3)
+assert ledger.lookup(conn, *crashed) is None
+assert ledger.claim(conn, *crashed) is None
+rows = conn.execute("SELECT COUNT(*) FROM payment_callbacks WHERE tran_id='T-crashed'").fetchone()[0]
+assert rows == 1, rows
+print("- claim older than claim_timeout: taken over, still one row")
+
+short = CallbackLedger(ttl=0.2, claim_timeout=0.2, purge_interval=0)
+expired = ("ssl_payment_success", "T-expired", "")
+assert short.claim(conn, *expired) is None
+short.complete(conn, *expired, 200, "{}")
+time.sleep(0.3)
+assert short.lookup(conn, *expired) is None
+assert short.claim(conn, "ssl_payment_success", "T-fresh", "") is None
+assert conn.execute("SELECT 1 FROM payment_callbacks WHERE tran_id='T-expired'").fetchone() is None
+print(f"- past ttl: ignored and purged ({short.stats()['purged']} row(s))")
+print(f"- stats: {ledger.stats()}")
+
+print("\n📌 Replay through the app:")
+client = main.app.test_client()
+replayed = new_booking(stay=("2041-06-01", "2041-06-03"))
+body = {"booking_id": replayed, "amount": 250, "tran_id": "T-app"}
+first = client.post("/simulate-payment-success", json=body)
+second = client.post("/simulate-payment-success", json=body)
+assert first.status_code == 200 and "X-Callback-Replayed" not in first.headers
+assert second.status_code == 200 and second.headers.get("X-Callback-Replayed") == "true"
+assert second.get_data() == first.get_data()
+assert booking_status(replayed) == "Confirmed"
+print("- second delivery answered from the ledger with the same body")
+
+print("\n📌 Hold sweeper:")
+conn.execute("UPDATE bookings SET booking_status='Cancelled' WHERE booking_status='Pending'")
+stale = [new_booking(stay=(f"2042-01-{2 * i + 1:02d}", f"2042-01-{2 * i + 2:02d}"),
+                     created_at="2000-01-01 00:00:00") for i in range(7)]
+paid_hold = stale.pop()
+apply(paid_hold, "completed", amount=100)
+conn.execute("UPDATE bookings SET booking_status='Pending' WHERE booking_id=?", (paid_hold,))
+fresh = new_booking(stay=("2042-02-01", "2042-02-03"))
+
+
+@contextlib.contextmanager
+def connection():
+    db = sqlite3.connect(main.DB_FILE, isolation_level=None)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+batches = []
+sweeper = HoldSweeper(connection, hold_minutes=30, batch_size=4, on_release=batches.append)
+released = sweeper.run_once()
+assert released == 6 and sorted(sum(batches, [])) == sorted(stale), (released, batches)
+assert [len(b) for b in batches] == [4, 2], batches
+assert all(booking_status(b) == "Cancelled" for b in stale)
+assert booking_status(paid_hold) == "Pending" and booking_status(fresh) == "Pending"
+print(f"- released {released} stale holds in batches of {[len(b) for b in batches]}")
+print("- holds with a completed payment and recent holds are kept")
+assert sweeper.run_once() == 0
+print(f"- second sweep releases nothing: {sweeper.stats()['released']} released in total")
+
+conn.close()
+shutil.rmtree(workdir, ignore_errors=True)
+print("\n✅ Payment events, callback replay and hold sweeping behave as specified")
@@ -0,0 +1,50 @@
+import sqlite3
+
+# Importing main runs the startup migrations, so the indexes exist before we look
+from main import DB_FILE, BOOKING_CONFLICT_SQL, BOOKING_OVERLAP_SQL, ROOM_BOOKED_SQL
+
+conn = sqlite3.connect(DB_FILE)
+
+params = {"room_id": 1, "check_in": "2026-03-01", "check_out": "2026-03-05", "exclude_booking_id": -1}
+
+
+def query_plan(sql):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+print("📌 Booking conflict check:")
+plan = query_plan(BOOKING_CONFLICT_SQL)
+for step in plan:
+    print("-", step)
+assert any("idx_bookings_active_room_dates (room_id=? AND check_in<?)" in step for step in plan), \
+    "conflict check does not range-scan the partial index"
+
+print("\n📌 Availability search:")
+AVAILABLE_SQL = f"SELECT r.room_id FROM rooms r WHERE NOT {ROOM_BOOKED_SQL} ORDER BY r.room_id"
+plan = query_plan(AVAILABLE_SQL)
+for step in plan:
+    print("-", step)
+assert any("idx_bookings_active_room_dates (room_id=? AND check_in<?)" in step for step in plan), \
+    "availability search does not range-scan the partial index"
+assert not any("TEMP B-TREE" in step for step in plan), \
+    "availability search sorts bookings instead of reading the index backwards"
+
+# ROOM_BOOKED_SQL relies on a room's active bookings being disjoint; it must agree
+# with the plain overlap test on the data we have
+OVERLAP_AVAILABLE_SQL = f"""
+    SELECT r.room_id FROM rooms r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM bookings b
+        WHERE b.room_id = r.room_id
+        AND {BOOKING_OVERLAP_SQL}
+    )
+    ORDER BY r.room_id
+"""
+for check_in, check_out in conn.execute("SELECT DISTINCT check_in, check_out FROM bookings LIMIT 200").fetchall():
+    stay = {"check_in": check_in, "check_out": check_out}
+    assert conn.execute(AVAILABLE_SQL, stay).fetchall() == conn.execute(OVERLAP_AVAILABLE_SQL, stay).fetchall(), \
+        f"availability search disagrees with the overlap test for {check_in} to {check_out}"
+
+conn.close()
+
+print("\n✅ Overlap queries use idx_bookings_active_room_dates")
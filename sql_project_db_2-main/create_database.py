@@ -1,7 +1,10 @@
 import sqlite3
+import sys
 
-# Connect to SQLite database (creates file if not exists)
-conn = sqlite3.connect("hotel_booking.db")
+# Connect to SQLite database (creates file if not exists); another path may be given,
+# e.g. for a benchmark database: python create_database.py bench/hotel_booking.db
+DB_FILE = sys.argv[1] if len(sys.argv) > 1 else "hotel_booking.db"
+conn = sqlite3.connect(DB_FILE)
 
 # Enable foreign key support
 conn.execute("PRAGMA foreign_keys = ON")
@@ -175,6 +178,62 @@ CREATE TABLE IF NOT EXISTS contact_messages (
 )
 """)
 
+# ================= PAYMENT CALLBACKS =================
+# One row per processed gateway callback delivery, so retries are answered once
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS payment_callbacks (
+    callback_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    endpoint TEXT NOT NULL,
+    tran_id TEXT NOT NULL,
+    val_id TEXT NOT NULL DEFAULT '',
+    status_code INTEGER,
+    response TEXT,
+    created_at REAL NOT NULL
+)
+""")
+cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_payment_callbacks_key ON payment_callbacks(endpoint, tran_id, val_id)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_payment_callbacks_created ON payment_callbacks(created_at)")
+
+# ================= INDEXES =================
+# Booking overlap checks and availability search only look at active bookings
+cursor.execute("""
+CREATE INDEX IF NOT EXISTS idx_bookings_active_room_dates
+ON bookings(room_id, check_in, check_out) WHERE booking_status != 'Cancelled'
+""")
+
+# List endpoint filters
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_user_check_in ON bookings(user_id, check_in)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_status_created ON bookings(booking_status, created_at)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_check_in ON bookings(check_in)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(payment_status)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_transaction ON payments(transaction_id)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_room ON reviews(room_id)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_user ON reviews(user_id)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_contact_messages_created ON contact_messages(created_at)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_contact_messages_status ON contact_messages(status, created_at)")
+
+# ================= TABLE VERSIONS =================
+# Bumped by triggers so caches can spot other processes' writes and catalog GETs
+# can answer If-None-Match without reading the table
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+""")
+
+for table in ["rooms", "room_features", "room_services", "system_settings", "bookings"]:
+    cursor.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+        END
+        """)
+
 # Commit changes and close connection
 conn.commit()
 conn.close()
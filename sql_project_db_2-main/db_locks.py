@@ -0,0 +1,112 @@
+import random
+import sqlite3
+import threading
+import time
+
+
+def is_busy_error(error):
+    """True for SQLITE_BUSY / SQLITE_LOCKED ("database is locked") errors"""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class WriteRetry:
+    """Opens write transactions with BEGIN IMMEDIATE, retrying busy errors with backoff.
+
+    BEGIN IMMEDIATE takes SQLite's write lock before anything is read, so a
+    check-then-insert inside the transaction cannot race another writer. When the
+    lock is still held after busy_timeout, the BEGIN is retried up to ``attempts``
+    times, sleeping ``base_delay * 2**n`` (capped at ``max_delay``, with jitter)
+    between tries so waiting writers spread out instead of retrying in lockstep.
+    """
+
+    def __init__(self, attempts=5, base_delay=0.05, max_delay=1.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._stats = {"begins": 0, "retries": 0, "failures": 0, "wait_time_ms": 0.0}
+
+    def begin(self, db):
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.attempts):
+                try:
+                    db.execute("BEGIN IMMEDIATE")
+                    with self._lock:
+                        self._stats["begins"] += 1
+                    return
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e) or attempt == self.attempts - 1:
+                        with self._lock:
+                            self._stats["failures"] += 1
+                        raise
+                    with self._lock:
+                        self._stats["retries"] += 1
+                    _add_to(db, "lock_retries", 1)
+                    delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+        finally:
+            waited = time.perf_counter() - started
+            with self._lock:
+                self._stats["wait_time_ms"] += waited * 1000
+            _add_to(db, "lock_wait", waited)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_time_ms"] = round(stats["wait_time_ms"], 3)
+        return stats
+
+
+def _add_to(db, counter, amount):
+    # Per-request counters live on pooled connections (db_pool.PooledConnection)
+    if hasattr(db, counter):
+        setattr(db, counter, getattr(db, counter) + amount)
+
+
+class KeyedLocks:
+    """One in-process lock per key (e.g. room_id), created on demand and dropped when unused.
+
+    Requests for the same room queue here inside the worker instead of all
+    competing for SQLite's write lock and burning busy_timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}  # key -> [lock, number of holders and waiters]
+
+    def hold(self, key):
+        return _KeyedHold(self, key)
+
+    def _acquire(self, key):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._locks[key]
+            entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def stats(self):
+        with self._lock:
+            return {"held_keys": len(self._locks)}
+
+
+class _KeyedHold:
+    def __init__(self, locks, key):
+        self.locks = locks
+        self.key = key
+
+    def __enter__(self):
+        self.locks._acquire(self.key)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.locks._release(self.key)
+        return False
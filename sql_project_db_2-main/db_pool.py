@@ -0,0 +1,264 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that adds its statements and fetch time to its connection's counters"""
+
+    statement_index = None  # where an attached SQLProfiler recorded this cursor's statement
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.statement_index = self.connection.count_query(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.statement_index = self.connection.count_query(time.perf_counter() - started)
+
+    # Rows after the first are stepped out of SQLite while fetching
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self.connection.count_fetch(time.perf_counter() - started, self.statement_index)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self.connection.count_fetch(time.perf_counter() - started, self.statement_index)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self.connection.count_fetch(time.perf_counter() - started, self.statement_index)
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that can carry per-connection bookkeeping (see cache_coherence.py)
+
+    It also counts the statements run through it since checkout and the time spent
+    in them (``queries``, ``query_time``), plus write-lock retries and waiting
+    recorded by db_locks.WriteRetry (``lock_retries``, ``lock_wait``). Rows read by
+    iterating a cursor directly are not timed.
+    """
+
+    data_version_seen = None
+    changes_seen = None
+
+    queries = 0
+    query_time = 0.0
+    lock_retries = 0
+    lock_wait = 0.0
+    profiler = None  # sql_profiler.SQLProfiler while a profiled request holds the connection
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute() bypasses overridden cursor methods, so route it here
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    # COMMIT is where WAL frames are written (and synced), so it counts as query time
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            elapsed = time.perf_counter() - started
+            self.query_time += elapsed
+            if self.profiler is not None:
+                self.profiler.timed(elapsed)
+
+    def count_query(self, seconds):
+        self.queries += 1
+        self.query_time += seconds
+        if self.profiler is not None:
+            return self.profiler.timed(seconds)
+        return None
+
+    def count_fetch(self, seconds, statement_index=None):
+        self.query_time += seconds
+        if self.profiler is not None:
+            self.profiler.add_time(statement_index, seconds)
+
+    def reset_counters(self):
+        if self.profiler is not None:
+            self.profiler.detach(self)
+        self.queries = 0
+        self.query_time = 0.0
+        self.lock_retries = 0
+        self.lock_wait = 0.0
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections for one worker process.
+
+    Connections are created lazily up to ``size`` and handed out one request at a
+    time. A connection is only pinged ("SELECT 1") when it has been idle for longer
+    than ``idle_check`` seconds, so hot connections are reused without any extra
+    round trip.
+    """
+
+    def __init__(self, db_file, size=10, timeout=30, idle_check=60, connect_timeout=20, on_connect=None):
+        self.db_file = db_file
+        self.size = size
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self.connect_timeout = connect_timeout
+        self.on_connect = on_connect
+
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._stats = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_ms": 0.0,
+            "validations": 0,
+            "discarded": 0,
+            "in_use": 0,
+        }
+
+    def _check_fork(self):
+        # Connections must never be shared between processes: a worker forked after
+        # the pool was used starts again with an empty pool of its own.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset_state()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=self.connect_timeout, check_same_thread=False,
+                               factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
+        if self.on_connect:
+            self.on_connect(conn)
+        with self._lock:
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._stats["discarded"] += 1
+
+    def acquire(self):
+        """Check out a connection, waiting up to ``timeout`` seconds for a free slot"""
+        self._check_fork()
+
+        if not self._slots.acquire(blocking=False):
+            started = time.perf_counter()
+            with self._lock:
+                self._stats["waits"] += 1
+            acquired = self._slots.acquire(timeout=self.timeout)
+            with self._lock:
+                self._stats["wait_time_ms"] += (time.perf_counter() - started) * 1000
+            if not acquired:
+                raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._connect()
+                    break
+
+                if time.monotonic() - last_used > self.idle_check:
+                    with self._lock:
+                        self._stats["validations"] += 1
+                    try:
+                        conn.execute("SELECT 1")
+                    except sqlite3.Error:
+                        self._discard(conn)
+                        conn = None
+        except Exception:
+            self._slots.release()
+            raise
+
+        conn.reset_counters()
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted"""
+        if self._pid != os.getpid():
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except sqlite3.Error:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def connection(self):
+        """Context manager for code that runs outside a Flask request"""
+        return _Checkout(self)
+
+    def close_all(self):
+        """Close every idle connection. Connections checked out at the time are not
+        closed: release() returns them to the idle queue as usual."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        stats["wait_time_ms"] = round(stats["wait_time_ms"], 3)
+        return stats
+
+
+class _Checkout:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.pool.release(self.conn)
+        return False
@@ -0,0 +1,100 @@
+"""Local stand-in for the SSLCommerz API, for tests and benchmarks.
+
+    python fake_gateway.py --port 7070 --latency 0.05 --fail-rate 0.1
+
+Point SSLCOMMERZ_BASE_URL at http://127.0.0.1:7070 (or build an SSLCommerzClient
+against it) and set SSLCOMMERZ_SIMULATION_MODE = False. Transactions whose id ends
+in "_FAILED" validate as FAILED, everything else as VALID.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real gateway
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        gateway = self.server
+        with gateway.lock:
+            gateway.stats["requests"] += 1
+            gateway.clients.add(self.client_address)
+            gateway.stats["connections"] = len(gateway.clients)
+
+        if gateway.latency:
+            time.sleep(gateway.latency)
+        if gateway.fail_rate and random.random() < gateway.fail_rate:
+            return self._reply(503, {"status": "FAILED", "failedreason": "Simulated outage"})
+
+        if self.path == "/gwprocess/v4/api.php":
+            if form.get("store_id") is None or form.get("tran_id") is None:
+                return self._reply(200, {"status": "FAILED", "failedreason": "Missing store_id or tran_id"})
+            return self._reply(200, {
+                "status": "SUCCESS",
+                "tran_id": form["tran_id"],
+                "sessionkey": f"FAKE{random.getrandbits(64):016X}",
+                "GatewayPageURL": f"http://{self.headers.get('Host')}/pay/{form['tran_id']}",
+            })
+        if self.path == "/validator/api/validationserverAPI.php":
+            tran_id = form.get("tran_id", "")
+            status = "FAILED" if tran_id.endswith("_FAILED") else "VALID"
+            return self._reply(200, {"status": status, "tran_id": tran_id, "amount": "0.00", "currency": "BDT"})
+        return self._reply(404, {"status": "FAILED", "failedreason": "Unknown endpoint"})
+
+
+class FakeGatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port, latency=0.0, fail_rate=0.0):
+        super().__init__(("127.0.0.1", port), FakeGatewayHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.stats = {"requests": 0, "connections": 0}
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up (read timeouts) close the socket before we answer
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_fake_gateway(port=0, latency=0.0, fail_rate=0.0):
+    """Serve the fake gateway from a daemon thread; returns (server, base_url)"""
+    server = FakeGatewayServer(port, latency, fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake SSLCommerz gateway")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, url = start_fake_gateway(args.port, args.latency, args.fail_rate)
+    print(f"✅ Fake SSLCommerz gateway on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
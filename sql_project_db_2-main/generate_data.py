@@ -0,0 +1,356 @@
+"""Synthetic hotel data at any scale, the same for the same seed.
+
+    python generate_data.py --rooms 200 --users 5000 --bookings 1000000
+    python generate_data.py --db bench/hotel_booking.db --bookings 10000000 --replace
+
+Fills a new database, or one just created by create_database.py. A database that
+already holds data is left alone unless --replace is given. Besides the admin
+and demo accounts that seed_data.py used to insert, it writes:
+
+- rooms with feature and service maps that match the room type;
+- users;
+- bookings: back-to-back stays per room, so no two active bookings of a room
+  overlap, numbered in check-in order like a live system would number them.
+  Stays that ended before --today are Confirmed, some Cancelled; later stays are
+  a mix of Pending, Confirmed and Cancelled;
+- a payment and an invoice for every Confirmed booking;
+- refunded payments with refunds for some Cancelled ones;
+- reviews for some past stays, and contact messages.
+
+Each room gets about 80 stays a year, so --bookings / --rooms sets how many
+years the history spans from --start. Rows go in with executemany() in
+transactions of --chunk-size bookings. Secondary indexes and the table_versions
+triggers are dropped for the load and rebuilt afterwards, followed by ANALYZE.
+"""
+import argparse
+import heapq
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import date
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+ADMINS = [("admin", "admin123", "super_admin"), ("manager", "manager123", "admin")]
+DEMO_USERS = [
+    ("Rahim Uddin", "khorsedalam0472@gmail.com", "pass123", "01711111111", "active", "admin"),
+    ("Karim Ahmed", "karim@gmail.com", "pass123", "01822222222", "active", "user"),
+    ("Nusrat Jahan", "nusrat@gmail.com", "pass123", "01933333333", "active", "user"),
+    ("Banned User", "banned@gmail.com", "pass123", "01644444444", "banned", "user"),
+]
+SYSTEM_SETTINGS = [
+    ("site_status", "online"),
+    ("booking_enabled", "true"),
+    ("maintenance_mode", "false"),
+    ("contact_address_line1", "Sayed Nagar B-Block Society"),
+    ("contact_address_line2", "Panir Pump Road"),
+    ("contact_phone", "01302616903"),
+    ("contact_email", "khorsedalam0472@gmail.com"),
+]
+
+FEATURES = [("AC", "fa-snowflake"), ("WiFi", "fa-wifi"), ("TV", "fa-tv"), ("Balcony", "fa-door-open"),
+            ("Mini Fridge", "fa-ice-cream"), ("Work Desk", "fa-briefcase"), ("Bathtub", "fa-bath"),
+            ("Sea View", "fa-water"), ("Safe", "fa-lock"), ("Coffee Maker", "fa-mug-hot")]
+SERVICES = ["Breakfast", "Laundry", "Room Service", "Airport Pickup", "Spa", "Parking"]
+
+# type, base price, share of rooms, features always included (1-based ids into FEATURES)
+ROOM_TYPES = [
+    ("Single", 2000, 40, (1, 2, 3)),
+    ("Double", 3000, 30, (1, 2, 3, 5)),
+    ("Deluxe", 4500, 20, (1, 2, 3, 4, 5, 6)),
+    ("Suite", 6500, 10, (1, 2, 3, 4, 5, 6, 7, 9)),
+]
+FIRST_NAMES = ["Rahim", "Karim", "Nusrat", "Ayesha", "Tanvir", "Farhana", "Sabbir", "Mitu", "Imran", "Sadia",
+               "Rakib", "Jannat", "Arif", "Sumaiya", "Hasan", "Tania", "Fahim", "Nadia", "Shakil", "Ritu"]
+LAST_NAMES = ["Uddin", "Ahmed", "Jahan", "Rahman", "Hossain", "Islam", "Khan", "Chowdhury", "Akter", "Sarkar"]
+PAYMENT_METHODS = ["SSLCommerz"] * 6 + ["Cash"] * 3 + ["Paytm"]
+CARD_TYPES = ["VISA-Dutch Bangla", "MASTER-City Bank", "BKASH-BKash", "NAGAD-Nagad"]
+NIGHTS = (1, 1, 2, 2, 2, 3, 3, 4, 5, 7)
+GAPS = (0, 0, 0, 1, 1, 2, 3, 5)
+REVIEW_COMMENTS = {
+    5: ["Excellent service and clean room", "Luxury stay, highly recommended", "Perfect in every way"],
+    4: ["Very good experience", "Comfortable room, friendly staff", "Would stay again"],
+    3: ["Average stay", "Room was fine, breakfast could be better"],
+    2: ["Noisy at night", "Room was not cleaned daily"],
+    1: ["Very disappointing", "AC did not work"],
+}
+MESSAGE_SUBJECTS = ["Booking enquiry", "Group booking", "Invoice request", "Lost item", "Feedback"]
+
+INSERT_SQL = {
+    "rooms": "INSERT INTO rooms (room_id, room_number, room_type, price, status, description) VALUES (?, ?, ?, ?, ?, ?)",
+    "room_feature_map": "INSERT INTO room_feature_map (room_id, feature_id) VALUES (?, ?)",
+    "room_service_map": "INSERT INTO room_service_map (room_id, service_id) VALUES (?, ?)",
+    "users": "INSERT INTO users (user_id, name, email, password, phone, status, role, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    "bookings": """INSERT INTO bookings (booking_id, user_id, room_id, check_in, check_out, booking_status,
+                   arrival_status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+    "payments": """INSERT INTO payments (payment_id, booking_id, amount, payment_method, payment_status,
+                   transaction_id, card_type, payment_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+    "refunds": "INSERT INTO refunds (payment_id, refund_amount, refund_status, refund_date) VALUES (?, ?, ?, ?)",
+    "reviews": "INSERT INTO reviews (user_id, room_id, rating, comment, created_at) VALUES (?, ?, ?, ?, ?)",
+    "invoices": "INSERT INTO invoices (booking_id, total_amount, invoice_date) VALUES (?, ?, ?)",
+    "contact_messages": """INSERT INTO contact_messages (name, email, phone, subject, message, status, created_at)
+                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+}
+
+
+class Days:
+    """Dates as day ordinals, with their ISO strings cached (formatting dominates otherwise)"""
+
+    def __init__(self):
+        self._iso = {}
+
+    def iso(self, ordinal):
+        text = self._iso.get(ordinal)
+        if text is None:
+            text = self._iso[ordinal] = date.fromordinal(ordinal).isoformat()
+        return text
+
+    def stamp(self, ordinal, seconds):
+        return f"{self.iso(ordinal)} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def room_rows(rng, count):
+    """(room row, feature ids, service ids) for ``count`` rooms"""
+    per_floor = max(1, min(50, count // 10))
+    weights = [t[2] for t in ROOM_TYPES]
+    for i in range(count):
+        room_type, base_price, _, features = rng.choices(ROOM_TYPES, weights=weights)[0]
+        number = f"{i // per_floor + 1}{i % per_floor + 1:02d}"
+        row = (i + 1, number, room_type, round(base_price * rng.uniform(0.85, 1.25), -1),
+               "Maintenance" if rng.random() < 0.02 else "Available", f"{room_type} room {number}")
+        extras = [f for f in range(1, len(FEATURES) + 1) if f not in features and rng.random() < 0.2]
+        services = [1, 3] + [s for s in (2, 4, 5, 6) if rng.random() < 0.4]
+        yield row, sorted(features + tuple(extras)), sorted(services)
+
+
+def user_rows(rng, count, days, start):
+    first = start.toordinal()
+    for i, demo in enumerate(DEMO_USERS):
+        yield (i + 1,) + demo + (days.stamp(first - 400, 9 * 3600),)
+    for user_id in range(len(DEMO_USERS) + 1, len(DEMO_USERS) + count + 1):
+        yield (user_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"user{user_id}@example.com",
+               "pass123", f"01{rng.choice('3456789')}{rng.randrange(10**8):08d}",
+               "banned" if rng.random() < 0.01 else "active", "user",
+               days.stamp(first - rng.randrange(365), rng.randrange(86400)))
+
+
+def room_stays(seed, room_id, count, first_day):
+    """``count`` non-overlapping (check_in, check_out, room_id) day ordinals of one room, in date order"""
+    rng = random.Random(f"{seed}-room-{room_id}")
+    day = first_day + rng.randrange(7)
+    for _ in range(count):
+        nights = rng.choice(NIGHTS)
+        yield day, day + nights, room_id
+        day += nights + rng.choice(GAPS)
+
+
+def stays(seed, room_ids, count, start):
+    """All stays of all rooms merged into check-in order"""
+    per_room, extra = divmod(count, len(room_ids))
+    return heapq.merge(*(room_stays(seed, room_id, per_room + (i < extra), start.toordinal())
+                         for i, room_id in enumerate(room_ids)))
+
+
+class BookingGenerator:
+    """Turns stays into bookings and the rows that hang off them, chunk by chunk"""
+
+    def __init__(self, seed, prices, users, days, today):
+        self.rng = random.Random(f"{seed}-bookings")
+        self.prices = prices
+        self.users = users
+        self.days = days
+        self.today = today.toordinal()
+        self.booking_id = 0
+        self.payment_id = 0
+
+    def rows(self, chunk):
+        rng = self.rng
+        days = self.days
+        out = {"bookings": [], "payments": [], "refunds": [], "reviews": [], "invoices": []}
+        for check_in, check_out, room_id in chunk:
+            self.booking_id += 1
+            booking_id = self.booking_id
+            user_id = rng.randrange(1, self.users + 1)
+            past = check_out <= self.today
+            roll = rng.random()
+            if past:
+                status = "Cancelled" if roll < 0.12 else "Confirmed"
+            else:
+                status = "Pending" if roll < 0.25 else "Cancelled" if roll < 0.35 else "Confirmed"
+            arrived = status == "Confirmed" and check_in <= self.today
+            created = check_in - rng.randrange(1, 90)
+            created_at = days.stamp(created, rng.randrange(86400))
+            out["bookings"].append((booking_id, user_id, room_id, days.iso(check_in), days.iso(check_out), status,
+                                    "Arrived" if arrived else "Not Arrived", created_at))
+
+            amount = self.prices[room_id] * (check_out - check_in)
+            paid = status == "Confirmed" or (status == "Cancelled" and rng.random() < 0.4)
+            if not paid:
+                continue
+            self.payment_id += 1
+            method = rng.choice(PAYMENT_METHODS)
+            out["payments"].append((
+                self.payment_id, booking_id, amount, method, "Completed" if status == "Confirmed" else "Refunded",
+                f"TXN{booking_id:010d}" if method != "Cash" else None,
+                rng.choice(CARD_TYPES) if method == "SSLCommerz" else None, created_at))
+            if status == "Cancelled":
+                refunded_on = min(created + rng.randrange(1, 10), check_in)
+                out["refunds"].append((self.payment_id, round(amount * rng.choice((0.5, 0.8, 1.0)), 2),
+                                       "Completed" if refunded_on < self.today else "Initiated",
+                                       days.stamp(refunded_on, rng.randrange(86400))))
+                continue
+            out["invoices"].append((booking_id, amount, created_at))
+            if past and rng.random() < 0.25:
+                rating = rng.choices((5, 4, 3, 2, 1), weights=(45, 30, 13, 7, 5))[0]
+                out["reviews"].append((user_id, room_id, rating, rng.choice(REVIEW_COMMENTS[rating]),
+                                       days.stamp(check_out + rng.randrange(7), rng.randrange(86400))))
+        return out
+
+
+def message_rows(rng, count, users, days, today):
+    for _ in range(count):
+        user = f"user{rng.randrange(len(DEMO_USERS) + 1, len(DEMO_USERS) + users + 1)}" if users else "guest"
+        subject = rng.choice(MESSAGE_SUBJECTS)
+        yield (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"{user}@example.com", None, subject,
+               f"{subject}: please get back to me.", rng.choice(("unread", "read", "replied")),
+               days.stamp(today.toordinal() - rng.randrange(365), rng.randrange(86400)))
+
+
+def prepare_file(db_file, replace):
+    """Make sure ``db_file`` holds an empty schema, creating or (with replace) recreating it"""
+    if os.path.exists(db_file):
+        conn = sqlite3.connect(db_file)
+        try:
+            has_data = any(conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                           for table in ("users", "rooms", "bookings"))
+        except sqlite3.OperationalError:
+            has_data = True  # not this app's schema
+        conn.close()
+        if has_data:
+            if not replace:
+                raise FileExistsError(f"{db_file} already contains data; pass --replace to regenerate it")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_file + suffix):
+                    os.remove(db_file + suffix)
+    if not os.path.exists(db_file):
+        subprocess.run([sys.executable, os.path.join(HERE, "create_database.py"), db_file],
+                       check=True, stdout=subprocess.DEVNULL)
+
+
+def drop_secondary_objects(conn):
+    """Drop explicit indexes and triggers; returns their CREATE statements for rebuild"""
+    objects = conn.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+    """).fetchall()
+    for kind, name, _ in objects:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    return [sql for _, _, sql in objects]
+
+
+def bump_versions(conn):
+    """Move every table_versions row past anything a previous database handed out.
+
+    The triggers were dropped during the load, and a regenerated file starts again
+    at 0, so without this clients could revalidate old ETags against new data.
+    """
+    conn.execute("UPDATE table_versions SET version = version + ?", (int(time.time() * 1000),))
+
+
+def insert(conn, counts, table, rows):
+    if rows:
+        conn.executemany(INSERT_SQL[table], rows)
+        counts[table] = counts.get(table, 0) + len(rows)
+
+
+def generate(db_file, rooms=100, users=1000, bookings=10000, seed=42, start=date(2020, 1, 1),
+             today=date(2026, 1, 1), chunk_size=100000, messages=None, replace=False, log=print):
+    """Fill ``db_file`` with a generated hotel; returns row counts per table"""
+    prepare_file(db_file, replace)
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    days = Days()
+    counts = {}
+
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")  # 256 MB
+    rebuild = drop_secondary_objects(conn)
+
+    # Indexes, version triggers and fresh versions come back even if the load fails part way
+    try:
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO admins (username, password, role) VALUES (?, ?, ?)", ADMINS)
+        conn.executemany("INSERT INTO room_features (feature_name, icon) VALUES (?, ?)", FEATURES)
+        conn.executemany("INSERT INTO room_services (service_name) VALUES (?)", [(s,) for s in SERVICES])
+        conn.executemany("INSERT OR REPLACE INTO system_settings (setting_key, setting_value) VALUES (?, ?)",
+                         SYSTEM_SETTINGS)
+        prices = {}
+        room_batch, feature_batch, service_batch = [], [], []
+        for row, features, services in room_rows(rng, rooms):
+            prices[row[0]] = row[3]
+            room_batch.append(row)
+            feature_batch.extend((row[0], f) for f in features)
+            service_batch.extend((row[0], s) for s in services)
+        insert(conn, counts, "rooms", room_batch)
+        insert(conn, counts, "room_feature_map", feature_batch)
+        insert(conn, counts, "room_service_map", service_batch)
+        user_batch = list(user_rows(rng, users, days, start))
+        insert(conn, counts, "users", user_batch)
+        conn.execute("COMMIT")
+        log(f"rooms={rooms} users={len(user_batch)} ({time.perf_counter() - started:.1f}s)")
+
+        generator = BookingGenerator(seed, prices, len(user_batch), days, today)
+        stay_stream = stays(seed, list(prices), bookings, start) if prices else iter(())
+        while True:
+            chunk = [stay for _, stay in zip(range(chunk_size), stay_stream)]
+            if not chunk:
+                break
+            conn.execute("BEGIN")
+            for table, rows in generator.rows(chunk).items():
+                insert(conn, counts, table, rows)
+            conn.execute("COMMIT")
+            log(f"bookings={counts['bookings']} payments={counts.get('payments', 0)} "
+                f"({time.perf_counter() - started:.1f}s)")
+
+        conn.execute("BEGIN")
+        insert(conn, counts, "contact_messages",
+               list(message_rows(rng, users // 50 if messages is None else messages, users, days, today)))
+        conn.execute("COMMIT")
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        for sql in rebuild:
+            conn.execute(sql)
+        bump_versions(conn)
+    conn.execute("ANALYZE")
+    conn.close()
+    log(f"indexes rebuilt ({time.perf_counter() - started:.1f}s)")
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic hotel database")
+    parser.add_argument("--db", default="hotel_booking.db", help="database file to fill")
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--users", type=int, default=1000, help="generated users, besides the demo accounts")
+    parser.add_argument("--bookings", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=None, help="contact messages (default users/50)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2020, 1, 1), help="first check-in date")
+    parser.add_argument("--today", type=date.fromisoformat, default=date(2026, 1, 1),
+                        help="stays ending before this date are in the past")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="bookings per transaction")
+    parser.add_argument("--replace", action="store_true", help="delete and regenerate a database that has data")
+    args = parser.parse_args()
+    try:
+        counts = generate(args.db, args.rooms, args.users, args.bookings, args.seed, args.start, args.today,
+                          args.chunk_size, args.messages, args.replace)
+    except FileExistsError as e:
+        sys.exit(f"❌ {e}")
+    print("✅ Generated " + ", ".join(f"{table}={n}" for table, n in counts.items()))
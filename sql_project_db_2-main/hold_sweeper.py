@@ -0,0 +1,151 @@
+"""Releases rooms held by abandoned checkouts.
+
+A booking stays Pending until it is paid. HoldSweeper cancels Pending bookings
+older than ``hold_minutes`` that have no completed payment, ``batch_size`` rows
+per write transaction so it never holds SQLite's write lock for long. main.py
+starts it as a thread in every process that serves requests, under any server.
+It can also run on its own, e.g. with main.HOLD_SWEEPER_ENABLED turned off:
+
+    python hold_sweeper.py --hold-minutes 30 --interval 60
+"""
+import argparse
+import contextlib
+import sqlite3
+import threading
+import time
+
+from app_logging import get_logger, setup_logging
+
+log = get_logger("hotel.hold_sweeper")
+
+# Served by idx_bookings_status_created: equality on status, range on created_at
+STALE_HOLDS_SQL = """
+    UPDATE bookings SET booking_status = 'Cancelled'
+    WHERE booking_id IN (
+        SELECT b.booking_id FROM bookings b
+        WHERE b.booking_status = 'Pending'
+        AND b.created_at < datetime('now', ?)
+        AND NOT EXISTS (
+            SELECT 1 FROM payments p
+            WHERE p.booking_id = b.booking_id AND p.payment_status IN ('Completed', 'Success')
+        )
+        LIMIT ?
+    )
+    RETURNING booking_id
+"""
+
+
+@contextlib.contextmanager
+def _immediate(db):
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+
+
+class HoldSweeper:
+    """Cancels stale Pending bookings in batches, once or every ``interval`` seconds.
+
+    ``connection`` returns a context manager yielding a connection, ``transaction(db)``
+    one that wraps a write transaction, and ``on_release(booking_ids)`` is told which
+    bookings each batch cancelled.
+    """
+
+    def __init__(self, connection, transaction=_immediate, hold_minutes=30, interval=60,
+                 batch_size=500, on_release=None):
+        self.connection = connection
+        self.transaction = transaction
+        self.hold_minutes = hold_minutes
+        self.interval = interval
+        self.batch_size = batch_size
+        self.on_release = on_release
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "released": 0, "last_released": 0, "last_run": None, "errors": 0}
+
+    def run_once(self):
+        """Sweep until no stale hold is left; returns how many bookings were released"""
+        released = 0
+        with self.connection() as db:
+            while True:
+                with self.transaction(db):
+                    ids = [r[0] for r in db.execute(STALE_HOLDS_SQL, (f"-{self.hold_minutes} minutes", self.batch_size))]
+                if ids and self.on_release:
+                    self.on_release(ids)
+                released += len(ids)
+                if len(ids) < self.batch_size:
+                    break
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["released"] += released
+            self._stats["last_released"] = released
+            self._stats["last_run"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        return released
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                released = self.run_once()
+                if released:
+                    log.info("Released stale holds", released=released, hold_minutes=self.hold_minutes)
+            except sqlite3.Error as e:
+                with self._lock:
+                    self._stats["errors"] += 1
+                log.error("Hold sweep failed", error=str(e))
+
+    def start(self):
+        """Start the sweep thread unless it is running; cheap enough to call per request.
+
+        Threads do not survive fork(), so a forked worker's first call starts its own.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name="hold-sweeper", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(hold_minutes=self.hold_minutes, interval=self.interval,
+                     running=self._thread is not None and self._thread.is_alive())
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cancel stale Pending bookings")
+    parser.add_argument("--db", default="hotel_booking.db")
+    parser.add_argument("--hold-minutes", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=60, help="seconds between sweeps")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--once", action="store_true", help="sweep once and exit")
+    args = parser.parse_args()
+    setup_logging()
+
+    @contextlib.contextmanager
+    def connection():
+        conn = sqlite3.connect(args.db, timeout=20, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    sweeper = HoldSweeper(connection, hold_minutes=args.hold_minutes, interval=args.interval,
+                          batch_size=args.batch_size)
+    while True:
+        released = sweeper.run_once()
+        log.info("Released stale holds", released=released, hold_minutes=args.hold_minutes)
+        if args.once:
+            break
+        time.sleep(args.interval)
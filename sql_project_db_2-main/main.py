@@ -1,10 +1,32 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, make_response, stream_with_context, send_file
 from flask_swagger_ui import get_swaggerui_blueprint
 from flask_cors import CORS
 import sqlite3
-import requests
 import json
+import base64
+import contextlib
+import functools
+import hashlib
+import logging
+import os
+import random
 import time
+from datetime import date
+from db_pool import ConnectionPool, PoolTimeout
+from booking_index import BookingIntervalIndex
+from settings_service import SettingsService
+from cache_coherence import CacheCoherence
+from db_locks import WriteRetry, KeyedLocks, is_busy_error
+from sslcommerz_client import SSLCommerzClient, CircuitBreaker, GatewayUnavailable
+from ttl_cache import CollapsingTTLCache
+from payment_state import apply_payment_event, BookingNotFound
+from callback_ledger import CallbackLedger, CALLBACK_LEDGER_SCHEMA, IN_PROGRESS
+from hold_sweeper import HoldSweeper
+from app_logging import setup_logging, get_logger
+from metrics import RequestMetrics
+from sql_profiler import SQLProfiler, summary_header
+from request_profiler import RequestProfile, PROFILE_MODES
+from profile_store import ProfileStore
 
 app = Flask(__name__)
 
@@ -13,7 +35,8 @@ CORS(app, resources={
     r"/*": {
         "origins": ["http://localhost:3000", "http://localhost:3001", "http://localhost:3002", "http://localhost:3003", "http://localhost:3004", "http://127.0.0.1:3000", "http://127.0.0.1:3001", "http://127.0.0.1:3002", "http://127.0.0.1:3003", "http://127.0.0.1:3004"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "X-Profile-SQL", "X-Profile-Request", "X-Profile-Mode", "X-Profile-Token"],
+        "expose_headers": ["X-SQL-Profile"],
         "supports_credentials": True
     }
 })
@@ -32,18 +55,84 @@ PAYMENT_RECIPIENT_PHONE = "01516512119"  # Bkash/Nagad number where money will b
 # Enable simulation mode for testing (set to False in production with real credentials)
 SSLCOMMERZ_SIMULATION_MODE = True
 
+# ---------------- Logging ----------------
+# Records are handed to a queue and written by a background thread (app_logging.py).
+# DEBUG adds per-request booking diagnostics; they are skipped entirely at INFO.
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "text"   # "text" or "json" (one object per line)
+LOG_FILE = None       # None logs to stderr
+
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_FILE)
+log = get_logger("hotel.api")
+db_log = get_logger("hotel.db")
+
+# Gateway calls share one keep-alive session; fake_gateway.py serves the same API locally
+SSLCOMMERZ_CONNECT_TIMEOUT = 3.05   # seconds
+SSLCOMMERZ_READ_TIMEOUT = 10        # seconds
+SSLCOMMERZ_STATUS_RETRIES = 2       # extra attempts for (idempotent) status lookups
+SSLCOMMERZ_BREAKER_FAILURES = 5     # consecutive failures that open the circuit breaker
+SSLCOMMERZ_BREAKER_RESET = 30       # seconds the breaker fails fast before probing again
+
+gateway = SSLCommerzClient(
+    SSLCOMMERZ_BASE_URL, SSLCOMMERZ_STORE_ID, SSLCOMMERZ_STORE_PASSWORD,
+    connect_timeout=SSLCOMMERZ_CONNECT_TIMEOUT, read_timeout=SSLCOMMERZ_READ_TIMEOUT,
+    status_retries=SSLCOMMERZ_STATUS_RETRIES,
+    breaker=CircuitBreaker(SSLCOMMERZ_BREAKER_FAILURES, SSLCOMMERZ_BREAKER_RESET)
+)
+
 # ---------------- Database Helper ----------------
 def init_database():
     """Initialize database with proper error handling"""
     try:
         # Import and run database creation
         import create_database
-        print("✅ Database initialized successfully!")
+        db_log.info("Database initialized")
         return True
     except Exception as e:
-        print(f"❌ Database initialization failed: {e}")
+        db_log.error("Database initialization failed", error=str(e))
         return False
 
+# Secondary indexes, kept in step with the INDEXES section of create_database.py
+SCHEMA_INDEXES = [
+    # Booking overlap check and availability search only look at active bookings
+    """CREATE INDEX IF NOT EXISTS idx_bookings_active_room_dates
+       ON bookings(room_id, check_in, check_out) WHERE booking_status != 'Cancelled'""",
+    # List endpoint filters
+    "CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_user_check_in ON bookings(user_id, check_in)",
+    # Status filter, and the hold sweeper's Pending-and-older-than scan
+    "CREATE INDEX IF NOT EXISTS idx_bookings_status_created ON bookings(booking_status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_check_in ON bookings(check_in)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(payment_status)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_transaction ON payments(transaction_id)",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_room ON reviews(room_id)",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_user ON reviews(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_contact_messages_created ON contact_messages(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_contact_messages_status ON contact_messages(status, created_at)",
+]
+
+# Tables that are cached in-process or answer conditional GETs; triggers bump
+# their row in table_versions on every insert, update and delete
+VERSIONED_TABLES = ["rooms", "room_features", "room_services", "system_settings", "bookings"]
+
+def create_version_triggers(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    for table in VERSIONED_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            """)
+
 def migrate_database():
     """Add missing columns to existing database tables"""
     try:
@@ -56,52 +145,342 @@ def migrate_database():
         
         if 'transaction_id' not in columns:
             cursor.execute("ALTER TABLE payments ADD COLUMN transaction_id TEXT")
-            print("✅ Added transaction_id column to payments table")
+            db_log.info("Added column to payments table", column="transaction_id")
         
         if 'card_type' not in columns:
             cursor.execute("ALTER TABLE payments ADD COLUMN card_type TEXT")
-            print("✅ Added card_type column to payments table")
+            db_log.info("Added column to payments table", column="card_type")
         
         if 'failure_reason' not in columns:
             cursor.execute("ALTER TABLE payments ADD COLUMN failure_reason TEXT")
-            print("✅ Added failure_reason column to payments table")
+            db_log.info("Added column to payments table", column="failure_reason")
+        
+        for statement in CALLBACK_LEDGER_SCHEMA:
+            cursor.execute(statement)
+        
+        # Superseded by idx_bookings_active_room_dates and idx_bookings_user_check_in
+        cursor.execute("DROP INDEX IF EXISTS idx_bookings_room_dates")
+        cursor.execute("DROP INDEX IF EXISTS idx_bookings_user")
+        # Superseded by idx_bookings_status_created
+        cursor.execute("DROP INDEX IF EXISTS idx_bookings_status")
+        for statement in SCHEMA_INDEXES:
+            cursor.execute(statement)
+        create_version_triggers(cursor)
         
         conn.commit()
         conn.close()
-        print("✅ Database migration completed!")
+        db_log.info("Database migration completed")
+        return True
+    except Exception as e:
+        db_log.error("Database migration failed", error=str(e))
+        return False
+
+# ---------------- SQLite Tuning ----------------
+# PRAGMA profiles; DB_PROFILE picks the one applied at startup and to every connection.
+# journal_mode is stored in the database file, everything else is per connection.
+DB_PRAGMA_PROFILES = {
+    "default": {
+        "journal_mode": "WAL",           # readers no longer block behind a committing writer
+        "synchronous": "NORMAL",         # safe with WAL, skips an fsync per commit
+        "cache_size": -20000,            # ~20 MB page cache per connection
+        "mmap_size": 268435456,          # 256 MB memory-mapped reads
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,            # ms to wait on a locked database before WriteRetry backs off
+        "foreign_keys": "ON",
+        "wal_autocheckpoint": 1000,      # pages; checkpoint after ~4 MB of WAL
+        "journal_size_limit": 67108864,  # truncate the WAL back to 64 MB after a checkpoint
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -20000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+        "wal_autocheckpoint": 1000,
+        "journal_size_limit": 67108864,
+    },
+}
+DB_PROFILE = "default"
+DB_CHECKPOINT_INTERVAL = 300  # seconds between manual PASSIVE checkpoints
+
+_last_checkpoint = time.monotonic()
+
+def apply_connection_pragmas(conn):
+    """Apply the per-connection part of the active PRAGMA profile"""
+    for name, value in DB_PRAGMA_PROFILES[DB_PROFILE].items():
+        if name != "journal_mode":
+            conn.execute(f"PRAGMA {name} = {value}")
+
+def configure_database():
+    """Switch the database to the profile's journal mode and fold any leftover WAL back in"""
+    try:
+        conn = sqlite3.connect(DB_FILE, timeout=20)
+        mode = conn.execute(f"PRAGMA journal_mode = {DB_PRAGMA_PROFILES[DB_PROFILE]['journal_mode']}").fetchone()[0]
+        apply_connection_pragmas(conn)
+        if mode == "wal":
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        db_log.info("Database configured", profile=DB_PROFILE, journal_mode=mode)
         return True
     except Exception as e:
-        print(f"❌ Database migration failed: {e}")
+        db_log.error("Database configuration failed", error=str(e))
         return False
 
+def checkpoint_database(conn, mode="PASSIVE"):
+    """Run a WAL checkpoint; PASSIVE never waits on readers or writers"""
+    global _last_checkpoint
+    _last_checkpoint = time.monotonic()
+    try:
+        return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    except sqlite3.Error as e:
+        db_log.warning("WAL checkpoint failed", error=str(e))
+        return None
+
 # Run migration on startup
 migrate_database()
+configure_database()
+
+# ---------------- Connection Pool ----------------
+DB_POOL_SIZE = 10          # max open connections per worker process
+DB_POOL_TIMEOUT = 30       # seconds a request waits for a free connection
+DB_POOL_IDLE_CHECK = 60    # ping a connection on checkout only after this many idle seconds
+
+db_pool = ConnectionPool(DB_FILE, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                         idle_check=DB_POOL_IDLE_CHECK, on_connect=apply_connection_pragmas)
 
 def get_db():
-    """Get database connection with error handling"""
+    """Get the request's pooled database connection (released in close_db)"""
+    if "db" in g:
+        return g.db
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=20)
-        conn.row_factory = sqlite3.Row
-        # Test connection
-        conn.execute("SELECT 1")
-        return conn
+        g.db = db_pool.acquire()
+        if "sql_profiler" in g:
+            g.sql_profiler.attach(g.db)
+        coherence.check(g.db)
+        return g.db
+    except PoolTimeout:
+        raise
     except sqlite3.Error as e:
-        print(f"❌ Database connection error: {e}")
+        db_log.error("Database connection error", error=str(e))
         # Try to reinitialize database
         if init_database():
             try:
-                conn = sqlite3.connect(DB_FILE, timeout=20)
-                conn.row_factory = sqlite3.Row
-                return conn
+                g.db = db_pool.acquire()
+                if "sql_profiler" in g:
+                    g.sql_profiler.attach(g.db)
+                coherence.check(g.db)
+                return g.db
             except sqlite3.Error as retry_error:
-                print(f"❌ Retry connection failed: {retry_error}")
+                db_log.error("Retry connection failed", error=str(retry_error))
                 raise
         else:
             raise
     except Exception as e:
-        print(f"❌ Unexpected database error: {e}")
+        db_log.exception("Unexpected database error")
         raise
 
+# system_settings is read on nearly every page view, so it is served from memory
+settings_service = SettingsService()
+with db_pool.connection() as conn:
+    settings_service.load(conn)
+
+# Write transactions start with BEGIN IMMEDIATE; a database still locked after
+# busy_timeout is retried DB_WRITE_ATTEMPTS times with exponential backoff
+DB_WRITE_ATTEMPTS = 5
+DB_WRITE_BACKOFF = 0.05      # seconds before the first retry, doubled each time
+DB_WRITE_MAX_BACKOFF = 1.0
+
+write_retry = WriteRetry(DB_WRITE_ATTEMPTS, DB_WRITE_BACKOFF, DB_WRITE_MAX_BACKOFF)
+
+# Other worker processes write to the same file; get_db() checks table versions
+# once per request and drops whatever they made stale
+coherence = CacheCoherence(VERSIONED_TABLES, begin=write_retry.begin)
+coherence.register("system_settings", settings_service.invalidate)
+
+@app.teardown_appcontext
+def close_db(exception=None):
+    """Return the request's connection to the pool"""
+    db = g.pop("db", None)
+    if db is not None:
+        # Backstop for wal_autocheckpoint, which can be starved by long-running readers
+        if not db.in_transaction and time.monotonic() - _last_checkpoint > DB_CHECKPOINT_INTERVAL:
+            checkpoint_database(db)
+        db_pool.release(db)
+
+# ---------------- Metrics ----------------
+# Per-route request counts, latency and DB time for this worker process, served in
+# Prometheus text format at /metrics. DB time and query counts come from the pooled
+# connection's counters (db_pool.PooledConnection), so no SQL tracing is involved.
+METRICS_ENABLED = True
+
+request_metrics = RequestMetrics()
+
+@app.before_request
+def start_request_timer():
+    if METRICS_ENABLED:
+        g.request_started = time.perf_counter()
+        request_metrics.started()
+
+@app.after_request
+def remember_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(exception=None):
+    """Runs before close_db, after a streamed response has been fully sent"""
+    started = g.pop("request_started", None)
+    if started is None:
+        return
+    db = g.get("db")
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    status = g.get("response_status", 500) if exception is None else 500
+    if db is None:
+        request_metrics.observe(request.method, route, status, time.perf_counter() - started)
+    else:
+        request_metrics.observe(request.method, route, status, time.perf_counter() - started,
+                                db.query_time, db.queries, db.lock_retries, db.lock_wait)
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint"""
+    pool = db_pool.stats()
+    locks = write_retry.stats()
+    extra = [
+        ("db_pool_connections_in_use", "gauge", "Pooled connections checked out", pool["in_use"]),
+        ("db_pool_connections_idle", "gauge", "Pooled connections waiting for reuse", pool["idle"]),
+        ("db_pool_waits_total", "counter", "Checkouts that had to wait for a free connection", pool["waits"]),
+        ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a free connection", pool["wait_time_ms"] / 1000),
+        ("db_write_begins_total", "counter", "Write transactions opened", locks["begins"]),
+        ("db_write_retries_total", "counter", "BEGIN IMMEDIATE retries after a busy database", locks["retries"]),
+        ("db_write_failures_total", "counter", "Write transactions given up on after every retry", locks["failures"]),
+    ]
+    return Response(request_metrics.render(extra), mimetype="text/plain; version=0.0.4")
+
+# ---------------- SQL Profiling ----------------
+# Opt-in per-request statement capture (sql_profiler.py). A request is profiled when
+# SQL_PROFILE_ALL is on, or when it sends X-Profile-SQL set to PROFILE_TOKEN. The
+# response carries an X-SQL-Profile summary; the full report, with query plans for
+# slow statements, is written to SQL_PROFILE_DIR.
+PROFILE_TOKEN = None              # shared secret for header-triggered profiling; None turns it off
+SQL_PROFILE_ALL = False           # profile every request (development only)
+SQL_PROFILE_SLOW_MS = 50          # statements at least this slow get EXPLAIN QUERY PLAN
+SQL_PROFILE_REPEAT_THRESHOLD = 3  # same statement shape this often in one request is reported
+SQL_PROFILE_DIR = "profiles/sql"
+SQL_PROFILE_KEEP = 200            # newest reports kept on disk
+
+sql_profile_store = ProfileStore(SQL_PROFILE_DIR, SQL_PROFILE_KEEP)
+
+def profiling_requested(header):
+    """True when the request carries the profiling token in ``header``"""
+    return PROFILE_TOKEN is not None and request.headers.get(header) == PROFILE_TOKEN
+
+@app.before_request
+def start_sql_profiler():
+    if SQL_PROFILE_ALL or profiling_requested("X-Profile-SQL"):
+        g.sql_profiler = SQLProfiler(SQL_PROFILE_SLOW_MS, SQL_PROFILE_REPEAT_THRESHOLD)
+
+@app.after_request
+def add_sql_profile_header(response):
+    profiler = g.get("sql_profiler")
+    if profiler is not None:
+        response.headers["X-SQL-Profile"] = summary_header(profiler.report())
+    return response
+
+@app.teardown_request
+def write_sql_profile(exception=None):
+    profiler = g.pop("sql_profiler", None)
+    if profiler is None:
+        return
+    db = g.get("db")
+    if db is not None:
+        profiler.detach(db)
+    report = profiler.report(db)
+    report.update(method=request.method, path=request.path,
+                  endpoint=request.url_rule.rule if request.url_rule is not None else None)
+    for repeated in report["repeated"]:
+        log.warning("Repeated SQL statement", path=request.path, count=repeated["count"], sql=repeated["sql"])
+    try:
+        capture_id = sql_profile_store.new_capture(f"{request.method}-{request.path.strip('/')}")
+        sql_profile_store.save_json(capture_id, report)
+        sql_profile_store.prune()
+        log.info("SQL profile written", capture=capture_id, queries=report["queries"], db_ms=report["db_ms"])
+    except OSError as e:
+        log.error("Could not write SQL profile", error=str(e))
+
+# ---------------- Request Profiling ----------------
+# cProfile and/or tracemalloc around a whole request (request_profiler.py), for
+# finding where a slow or memory-hungry call spends its time. A request is captured
+# when it sends X-Profile-Request set to PROFILE_TOKEN (modes from X-Profile-Mode,
+# default both), or at random with probability PROFILE_SAMPLE_RATE. Captures are
+# listed at GET /admin/profiles and downloaded from /admin/profiles/<kind>/<file>.
+PROFILE_SAMPLE_RATE = 0.0            # fraction of requests captured without being asked
+PROFILE_SAMPLE_MODES = ("cpu",)      # tracemalloc slows everything down; sample CPU only
+PROFILE_DIR = "profiles/requests"
+PROFILE_KEEP = 100                   # newest captures kept on disk
+
+request_profile_store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+profile_stores = {"requests": request_profile_store, "sql": sql_profile_store}
+
+@app.before_request
+def start_request_profile():
+    if request.path.startswith("/admin/profiles"):
+        return
+    if profiling_requested("X-Profile-Request"):
+        modes = [m.strip() for m in request.headers.get("X-Profile-Mode", ",".join(PROFILE_MODES)).split(",")]
+        g.request_profile = RequestProfile(modes, "header")
+    elif PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        g.request_profile = RequestProfile(PROFILE_SAMPLE_MODES, "sample")
+    else:
+        return
+    g.request_profile.start()
+
+@app.after_request
+def remember_profiled_status(response):
+    if "request_profile" in g:
+        g.request_profile_status = response.status_code
+    return response
+
+@app.teardown_request
+def write_request_profile(exception=None):
+    profile = g.pop("request_profile", None)
+    if profile is None:
+        return
+    try:
+        capture_id = request_profile_store.new_capture(f"{request.method}-{request.path.strip('/')}")
+        summary = profile.stop(request_profile_store, capture_id)
+        summary.update(method=request.method, path=request.path, status=g.get("request_profile_status", 500))
+        request_profile_store.save_json(capture_id, summary)
+        request_profile_store.prune()
+        log.info("Request profile written", capture=capture_id, duration_ms=summary["duration_ms"])
+    except OSError as e:
+        log.error("Could not write request profile", error=str(e))
+
+def require_profile_token(f):
+    """Profiling captures expose code paths and data shapes: only holders of PROFILE_TOKEN see them"""
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not profiling_requested("X-Profile-Token"):
+            return jsonify({"error": "Profiling token required"}), 403
+        return f(*args, **kwargs)
+    return wrapper
+
+@app.route("/admin/profiles", methods=["GET"])
+@require_profile_token
+def list_profiles():
+    return jsonify({kind: store.list() for kind, store in profile_stores.items()})
+
+@app.route("/admin/profiles/<kind>/<file_name>", methods=["GET"])
+@require_profile_token
+def download_profile(kind, file_name):
+    store = profile_stores.get(kind)
+    path = store.resolve(file_name) if store is not None else None
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, as_attachment=True, download_name=file_name)
+
 # ---------------- Swagger Setup ----------------
 SWAGGER_URL = "/swagger"
 API_URL = "/static/swagger.json"  # You can provide swagger.json if needed
@@ -120,16 +499,210 @@ def health_check():
     try:
         db = get_db()
         db.execute("SELECT 1")
-        db.close()
-        return jsonify({"status": "healthy", "database": "connected"}), 200
+        return jsonify({"status": "healthy", "database": "connected", "pool": db_pool.stats(),
+                        "cache_coherence": coherence.stats(), "write_locks": write_retry.stats(),
+                        "payment_gateway": gateway.stats(),
+                        "payment_status_cache": payment_status_cache.stats(),
+                        "payment_callbacks": callback_ledger.stats(),
+                        "hold_sweeper": hold_sweeper.stats()}), 200
     except Exception as e:
-        return jsonify({"status": "unhealthy", "error": str(e)}), 500
+        return jsonify({"status": "unhealthy", "error": str(e), "pool": db_pool.stats()}), 500
+
+@app.errorhandler(sqlite3.IntegrityError)
+def integrity_error(e):
+    """Constraint violations (now including foreign keys) are client errors, not crashes"""
+    return jsonify({"error": "Database constraint violated", "details": str(e)}), 409
+
+@app.errorhandler(sqlite3.OperationalError)
+def database_busy(e):
+    """A write lock that stays taken through every retry means overload: ask the client to retry"""
+    if not is_busy_error(e):
+        raise e
+    response = jsonify({"error": "Database is busy, please retry", "details": str(e)})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+@app.route("/pool-stats")
+def pool_stats():
+    """Connection pool counters for this worker process"""
+    return jsonify(db_pool.stats())
+
+@app.route("/booking-index/verify")
+def verify_booking_index():
+    """Compare the in-memory booking index with the bookings table"""
+    mismatched = booking_index.verify(get_db())
+    for room_id in mismatched:
+        booking_index.invalidate(room_id)
+    return jsonify({"consistent": not mismatched, "mismatched_rooms": mismatched, **booking_index.stats()})
 
 # ---------------- Root ----------------
 @app.route("/")
 def home():
     return "<h2>Hotel Booking Management System API is running! Go to /swagger to see API docs.</h2>"
 
+# ---------------- List Helpers ----------------
+LIST_MAX_LIMIT = 500      # largest page a list endpoint will return
+STREAM_CHUNK_SIZE = 500   # rows fetched per fetchmany() when streaming
+
+class InvalidListQuery(ValueError):
+    """Bad ?limit=/?after= or filter argument on a list endpoint"""
+
+@app.errorhandler(InvalidListQuery)
+def invalid_list_query(e):
+    return jsonify({"error": str(e)}), 400
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidListQuery("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidListQuery("Invalid cursor")
+    return values
+
+def build_list_query(select_sql, filters, keys, descending=False, scope=None):
+    """Add the endpoint's filters and ?limit=&after= keyset pagination to a list query.
+
+    filters maps a query-string argument to the WHERE clause it enables (bound as
+    :<argument>); keys are the ORDER BY columns, the last of which must be unique.
+    scope is an optional (clause, params) pair that is always applied.
+    Returns (sql, params, limit); limit is None when the client did not ask for paging.
+    """
+    conditions, params = [], {}
+    if scope:
+        conditions.append(scope[0])
+        params.update(scope[1])
+    for arg, clause in filters.items():
+        value = request.args.get(arg)
+        if value not in (None, ""):
+            conditions.append(clause)
+            params[arg] = value
+
+    after = request.args.get("after")
+    if after:
+        values = decode_cursor(after, len(keys))
+        placeholders = [f":after_{i}" for i in range(len(keys))]
+        conditions.append(f"({', '.join(keys)}) {'<' if descending else '>'} ({', '.join(placeholders)})")
+        params.update({f"after_{i}": v for i, v in enumerate(values)})
+
+    sql = select_sql
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(f"{k} {'DESC' if descending else 'ASC'}" for k in keys)
+
+    limit = request.args.get("limit")
+    if limit is not None:
+        try:
+            limit = max(1, min(int(limit), LIST_MAX_LIMIT))
+        except ValueError:
+            raise InvalidListQuery("limit must be an integer")
+        sql += " LIMIT :limit"
+        params["limit"] = limit + 1
+    return sql, params, limit
+
+def stream_format():
+    """'ndjson' or 'array' when the client asked for a streamed response, else None"""
+    stream = request.args.get("stream", "")
+    if stream == "ndjson" or "application/x-ndjson" in request.headers.get("Accept", ""):
+        return "ndjson"
+    if stream.lower() in ("1", "true", "array"):
+        return "array"
+    return None
+
+def stream_rows(cursor, fmt, limit, keys):
+    """Yield the rows of an executed query as a JSON array or NDJSON, STREAM_CHUNK_SIZE at a time"""
+    paged = "limit" in request.args or "after" in request.args
+    if fmt == "array":
+        yield '{"items": [' if paged else "["
+    sent = fetched = 0
+    last = None
+    while True:
+        chunk = cursor.fetchmany(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        fetched += len(chunk)
+        parts = []
+        for row in chunk:
+            if limit is not None and sent == limit:
+                break
+            if fmt == "array":
+                parts.append(("," if sent else "") + app.json.dumps(dict(row)))
+            else:
+                parts.append(app.json.dumps(dict(row)) + "\n")
+            sent += 1
+            last = row
+        if parts:
+            yield "".join(parts)
+        if limit is not None and sent == limit:
+            break
+
+    next_cursor = None
+    if limit is not None and (fetched > limit or (fetched == limit and cursor.fetchone() is not None)):
+        next_cursor = encode_cursor([last[k.split(".")[-1]] for k in keys])
+    if fmt == "array":
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}' if paged else "]"
+    elif paged:
+        yield json.dumps({"next_cursor": next_cursor}) + "\n"
+
+def list_endpoint(db, select_sql, filters, keys, descending=False, scope=None):
+    """Response for a list endpoint: a paged envelope when the client asked for paging,
+    a bare array otherwise, streamed from the cursor when ?stream= or an NDJSON Accept
+    header is given"""
+    sql, params, limit = build_list_query(select_sql, filters, keys, descending, scope)
+
+    fmt = stream_format()
+    if fmt:
+        cursor = db.execute(sql, params)
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+        return Response(stream_with_context(stream_rows(cursor, fmt, limit, keys)), mimetype=mimetype)
+
+    rows = db.execute(sql, params).fetchall()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][k.split(".")[-1]] for k in keys])
+
+    items = [dict(r) for r in rows]
+    if "limit" in request.args or "after" in request.args:
+        return jsonify({"items": items, "next_cursor": next_cursor})
+    return jsonify(items)
+
+# ---------------- Conditional GET ----------------
+CATALOG_CACHE_CONTROL = "no-cache"  # clients may keep a copy but must revalidate with If-None-Match
+
+def conditional_get(*tables):
+    """Give GET responses a strong ETag built from the tables' versions, the request
+    URL and the response format, and answer a matching If-None-Match with 304 before
+    the handler runs. The format can come from Accept, hence Vary: Accept."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            get_db()  # runs the coherence check, which refreshes the known versions
+            versions = coherence.versions(tables)
+            # JSON and NDJSON bodies of the same URL are different representations
+            variant = f"{request.full_path}|{stream_format() or 'json'}"
+            digest = hashlib.sha1(variant.encode()).hexdigest()[:12]
+            etag = "-".join(str(v) for v in versions) + "-" + digest
+
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.vary.add("Accept")
+            response.headers["Cache-Control"] = CATALOG_CACHE_CONTROL
+            return response
+        return wrapper
+    return decorator
+
 # ================== USERS ==================
 @app.route("/login", methods=["POST"])
 def login():
@@ -144,7 +717,6 @@ def login():
         
         db = get_db()
         user = db.execute("SELECT * FROM users WHERE email=?", (email,)).fetchone()
-        db.close()
         
         if not user:
             return jsonify({"error": "Invalid email or password"}), 401
@@ -165,16 +737,19 @@ def login():
         }), 200
         
     except Exception as e:
-        print(f"Login error: {e}")
+        log.exception("Login failed")
         return jsonify({"error": "Login failed"}), 500
 
 @app.route("/users", methods=["GET", "POST"])
 def users():
     db = get_db()
     if request.method == "GET":
-        users = db.execute("SELECT * FROM users").fetchall()
-        db.close()
-        return jsonify([dict(u) for u in users])
+        return list_endpoint(db, "SELECT * FROM users", {
+            "status": "status = :status",
+            "role": "role = :role",
+            "from": "created_at >= :from",
+            "to": "created_at < :to",
+        }, ["user_id"])
 
     # POST - Add new user
     data = request.get_json()
@@ -183,7 +758,6 @@ def users():
         (data["name"], data["email"], data["password"], data.get("phone"), data.get("status", "active"))
     )
     db.commit()
-    db.close()
     return jsonify({"message": "User added"}), 201
 
 @app.route("/users/<int:user_id>", methods=["GET", "PUT", "DELETE"])
@@ -191,7 +765,6 @@ def user_detail(user_id):
     db = get_db()
     if request.method == "GET":
         user = db.execute("SELECT * FROM users WHERE user_id=?", (user_id,)).fetchone()
-        db.close()
         if user:
             return jsonify(dict(user))
         return jsonify({"error": "User not found"}), 404
@@ -202,7 +775,6 @@ def user_detail(user_id):
         # Get current user to preserve existing values
         current_user = db.execute("SELECT * FROM users WHERE user_id=?", (user_id,)).fetchone()
         if not current_user:
-            db.close()
             return jsonify({"error": "User not found"}), 404
         
         # Prepare update values, keeping existing values if not provided
@@ -216,23 +788,193 @@ def user_detail(user_id):
             UPDATE users SET name=?, email=?, password=?, phone=?, status=? WHERE user_id=?
         """, (name, email, password, phone, status, user_id))
         db.commit()
-        db.close()
         return jsonify({"message": "User updated"})
 
     elif request.method == "DELETE":
         db.execute("DELETE FROM users WHERE user_id=?", (user_id,))
         db.commit()
-        db.close()
         return jsonify({"message": "User deleted"})
 
+# ================== PER-USER DATA ==================
+def user_exists(db, user_id):
+    return db.execute("SELECT 1 FROM users WHERE user_id=?", (user_id,)).fetchone() is not None
+
+@app.route("/users/<int:user_id>/bookings", methods=["GET"])
+def user_bookings(user_id):
+    """One guest's bookings with room and payment details, newest stay first"""
+    db = get_db()
+    if not user_exists(db, user_id):
+        return jsonify({"error": "User not found"}), 404
+    return list_endpoint(db, """
+        SELECT b.*, u.name as user_name, r.room_number, r.room_type, r.price,
+               p.payment_id, p.amount, p.payment_method, p.payment_status, p.transaction_id
+        FROM bookings b
+        JOIN users u ON b.user_id=u.user_id
+        JOIN rooms r ON b.room_id=r.room_id
+        LEFT JOIN payments p ON p.booking_id=b.booking_id
+    """, {
+        "status": "b.booking_status = :status",
+        "from": "b.check_in >= :from",
+        "to": "b.check_in < :to",
+    }, ["b.check_in", "b.booking_id"], descending=True, scope=("b.user_id = :user_id", {"user_id": user_id}))
+
+@app.route("/users/<int:user_id>/reviews", methods=["GET"])
+def user_reviews(user_id):
+    """One guest's reviews, newest first"""
+    db = get_db()
+    if not user_exists(db, user_id):
+        return jsonify({"error": "User not found"}), 404
+    return list_endpoint(db, """
+        SELECT r.*, u.name as user_name, rm.room_number, rm.room_type
+        FROM reviews r
+        JOIN users u ON r.user_id=u.user_id
+        JOIN rooms rm ON r.room_id=rm.room_id
+    """, {
+        "room_id": "r.room_id = :room_id",
+    }, ["r.review_id"], descending=True, scope=("r.user_id = :user_id", {"user_id": user_id}))
+
+@app.route("/users/<int:user_id>/summary", methods=["GET"])
+def user_summary(user_id):
+    """Headline numbers for one guest's profile page"""
+    db = get_db()
+    if not user_exists(db, user_id):
+        return jsonify({"error": "User not found"}), 404
+    summary = db.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM bookings WHERE user_id = :user_id) AS total_bookings,
+            (SELECT COUNT(*) FROM bookings
+                WHERE user_id = :user_id AND booking_status = 'Confirmed') AS confirmed_bookings,
+            (SELECT COUNT(*) FROM bookings
+                WHERE user_id = :user_id AND booking_status = 'Pending') AS pending_bookings,
+            (SELECT COUNT(*) FROM bookings
+                WHERE user_id = :user_id AND booking_status = 'Cancelled') AS cancelled_bookings,
+            (SELECT COUNT(*) FROM bookings
+                WHERE user_id = :user_id AND check_in >= :today AND booking_status != 'Cancelled') AS upcoming_stays,
+            (SELECT MIN(check_in) FROM bookings
+                WHERE user_id = :user_id AND check_in >= :today AND booking_status != 'Cancelled') AS next_check_in,
+            (SELECT COALESCE(SUM(p.amount), 0) FROM bookings b JOIN payments p ON p.booking_id = b.booking_id
+                WHERE b.user_id = :user_id AND p.payment_status IN ('Completed', 'Success')) AS total_spent,
+            (SELECT COUNT(*) FROM reviews WHERE user_id = :user_id) AS total_reviews,
+            (SELECT ROUND(AVG(rating), 2) FROM reviews WHERE user_id = :user_id) AS average_rating
+    """, {"user_id": user_id, "today": date.today().isoformat()}).fetchone()
+    return jsonify({"user_id": user_id, **dict(summary)})
+
+# ---------------- Booking Overlap ----------------
+# Active booking b overlaps the stay [:check_in, :check_out). Used by the booking
+# conflict checks; ROOM_BOOKED_SQL below answers the same question per room for
+# the availability search.
+# Stays are half-open, so a check-out and the next check-in may fall on the same day.
+# The status test must stay textually identical to the WHERE clause of
+# idx_bookings_active_room_dates or SQLite will not use that partial index.
+BOOKING_OVERLAP_SQL = """
+    b.booking_status != 'Cancelled'
+    AND b.check_in < :check_out AND b.check_out > :check_in
+"""
+
+# True when room r has an active booking overlapping [:check_in, :check_out), for the
+# availability search. The conflict checks keep a room's active bookings disjoint, so
+# ordered by check_in they are ordered by check_out too: only the last one starting
+# before :check_out can reach past :check_in. That is one descending seek on
+# idx_bookings_active_room_dates per room, where BOOKING_OVERLAP_SQL would scan every
+# earlier booking of the room once the searched dates lie beyond the history.
+ROOM_BOOKED_SQL = """
+    COALESCE((
+        SELECT b.check_out FROM bookings b
+        WHERE b.room_id = r.room_id
+        AND b.booking_status != 'Cancelled'
+        AND b.check_in < :check_out
+        ORDER BY b.check_in DESC LIMIT 1
+    ), '') > :check_in
+"""
+
+# Rooms have no capacity column, so the guests filter goes through the room type
+ROOM_TYPE_CAPACITY = {"Single": 1, "Double": 2, "Deluxe": 3, "Suite": 4}
+
+BOOKING_CONFLICT_SQL = f"""
+    SELECT b.booking_id, b.booking_status, b.check_in, b.check_out FROM bookings b
+    WHERE b.room_id = :room_id
+    AND b.booking_id != :exclude_booking_id
+    AND {BOOKING_OVERLAP_SQL}
+"""
+
+# In-memory interval index answering conflict checks; BOOKING_INDEX_VERIFY makes every
+# check also run BOOKING_CONFLICT_SQL and fall back to it when the two disagree.
+BOOKING_INDEX_ENABLED = True
+BOOKING_INDEX_VERIFY = False
+
+booking_index = BookingIntervalIndex()
+coherence.register("bookings", booking_index.invalidate)
+
+room_locks = KeyedLocks()
+
+@contextlib.contextmanager
+def booking_write(db, *room_ids):
+    """tracked_write on bookings for callers that also update booking_index.
+
+    Index changes belong inside the block so they land before the commit; a conflict
+    check can then never see the new row with a stale index. If the transaction rolls
+    back, every room in the yielded set is dropped from the index and reloaded on its
+    next lookup. Callers add rooms they touch beyond room_ids to that set.
+    """
+    touched = {int(room_id) for room_id in room_ids}
+    try:
+        with coherence.tracked_write(db, "bookings"):
+            yield touched
+    except BaseException:
+        for room_id in touched:
+            booking_index.invalidate(room_id)
+        raise
+
+# Pending bookings hold their room until paid; the sweeper cancels holds older than
+# BOOKING_HOLD_MINUTES that have no completed payment, HOLD_SWEEP_BATCH rows at a time
+HOLD_SWEEPER_ENABLED = True
+BOOKING_HOLD_MINUTES = 30
+HOLD_SWEEP_INTERVAL = 60   # seconds between sweeps
+HOLD_SWEEP_BATCH = 500     # bookings cancelled per write transaction
+
+def release_holds(booking_ids):
+    for booking_id in booking_ids:
+        booking_index.discard(booking_id)
+
+hold_sweeper = HoldSweeper(
+    db_pool.connection, lambda db: coherence.tracked_write(db, "bookings"),
+    hold_minutes=BOOKING_HOLD_MINUTES, interval=HOLD_SWEEP_INTERVAL,
+    batch_size=HOLD_SWEEP_BATCH, on_release=release_holds
+)
+
+@app.before_request
+def start_hold_sweeper():
+    """Run the sweeper in whichever process serves requests: the dev server, flask run
+    or each WSGI worker. The reloader's parent never serves, so it never sweeps."""
+    if HOLD_SWEEPER_ENABLED:
+        hold_sweeper.start()
+
+def find_overlapping_bookings(db, room_id, check_in, check_out, exclude_booking_id=None):
+    """Active bookings of room_id that overlap the given stay"""
+    if BOOKING_INDEX_ENABLED:
+        found = booking_index.overlapping(db, room_id, check_in, check_out, exclude_booking_id)
+        if not BOOKING_INDEX_VERIFY:
+            return found
+    rows = db.execute(BOOKING_CONFLICT_SQL, {
+        "room_id": room_id, "check_in": check_in, "check_out": check_out,
+        "exclude_booking_id": exclude_booking_id or -1,
+    }).fetchall()
+    if BOOKING_INDEX_ENABLED and sorted(tuple(r) for r in rows) != sorted(found):
+        log.warning("Booking index mismatch", room_id=room_id, index=found, sql=[tuple(r) for r in rows])
+        booking_index.invalidate(int(room_id))
+    return rows
+
 # ================== ROOMS ==================
 @app.route("/rooms", methods=["GET", "POST"])
+@conditional_get("rooms")
 def rooms():
     db = get_db()
     if request.method == "GET":
-        rooms = db.execute("SELECT * FROM rooms").fetchall()
-        db.close()
-        return jsonify([dict(r) for r in rooms])
+        return list_endpoint(db, "SELECT * FROM rooms", {
+            "status": "status = :status",
+            "room_type": "room_type = :room_type",
+            "max_price": "price <= :max_price",
+        }, ["room_id"])
 
     data = request.get_json()
     # Check if image_url exists in the request data
@@ -248,15 +990,58 @@ def rooms():
             (data["room_number"], data["room_type"], data["price"], data.get("status", "Available"), data.get("description"))
         )
     db.commit()
-    db.close()
     return jsonify({"message": "Room added"}), 201
 
+@app.route("/rooms/available", methods=["GET"])
+def available_rooms():
+    """Rooms with no active booking overlapping [check_in, check_out)"""
+    check_in = request.args.get("check_in")
+    check_out = request.args.get("check_out")
+    if not check_in or not check_out:
+        return jsonify({"error": "check_in and check_out are required"}), 400
+    try:
+        if date.fromisoformat(check_in) >= date.fromisoformat(check_out):
+            return jsonify({"error": "check_out must be after check_in"}), 400
+    except ValueError:
+        return jsonify({"error": "Dates must be in YYYY-MM-DD format"}), 400
+
+    conditions = ["r.status = 'Available'"]
+    params = {"check_in": check_in, "check_out": check_out}
+
+    room_type = request.args.get("room_type")
+    if room_type:
+        conditions.append("r.room_type = :room_type")
+        params["room_type"] = room_type
+
+    max_price = request.args.get("max_price", type=float)
+    if max_price is not None:
+        conditions.append("r.price <= :max_price")
+        params["max_price"] = max_price
+
+    guests = request.args.get("guests", type=int)
+    if guests:
+        types = [t for t, capacity in ROOM_TYPE_CAPACITY.items() if capacity >= guests]
+        if not types:
+            return jsonify([])
+        placeholders = ", ".join(f":type_{i}" for i in range(len(types)))
+        conditions.append(f"r.room_type IN ({placeholders})")
+        params.update({f"type_{i}": t for i, t in enumerate(types)})
+
+    db = get_db()
+    rooms = db.execute(f"""
+        SELECT r.* FROM rooms r
+        WHERE {" AND ".join(conditions)}
+        AND NOT {ROOM_BOOKED_SQL}
+        ORDER BY r.price, r.room_id
+    """, params).fetchall()
+    return jsonify([dict(r) for r in rooms])
+
 @app.route("/rooms/<int:room_id>", methods=["GET", "PUT", "DELETE"])
+@conditional_get("rooms")
 def room_detail(room_id):
     db = get_db()
     if request.method == "GET":
         room = db.execute("SELECT * FROM rooms WHERE room_id=?", (room_id,)).fetchone()
-        db.close()
         if room:
             return jsonify(dict(room))
         return jsonify({"error": "Room not found"}), 404
@@ -274,13 +1059,11 @@ def room_detail(room_id):
                 UPDATE rooms SET room_number=?, room_type=?, price=?, status=?, description=? WHERE room_id=?
             """, (data["room_number"], data["room_type"], data["price"], data.get("status"), data.get("description"), room_id))
         db.commit()
-        db.close()
         return jsonify({"message": "Room updated"})
 
     elif request.method == "DELETE":
         db.execute("DELETE FROM rooms WHERE room_id=?", (room_id,))
         db.commit()
-        db.close()
         return jsonify({"message": "Room deleted"})
 
 # ================== BOOKINGS ==================
@@ -288,14 +1071,22 @@ def room_detail(room_id):
 def bookings():
     db = get_db()
     if request.method == "GET":
-        bookings = db.execute("""
+        return list_endpoint(db, """
             SELECT b.*, u.name as user_name, r.room_number
             FROM bookings b
             JOIN users u ON b.user_id=u.user_id
             JOIN rooms r ON b.room_id=r.room_id
-        """).fetchall()
-        db.close()
-        return jsonify([dict(b) for b in bookings])
+        """, {
+            "status": "b.booking_status = :status",
+            "arrival_status": "b.arrival_status = :arrival_status",
+            "user_id": "b.user_id = :user_id",
+            "room_id": "b.room_id = :room_id",
+            "from": "b.check_in >= :from",
+            "to": "b.check_in < :to",
+        }, ["b.booking_id"])
+
+    if not settings_service.booking_enabled(db):
+        return jsonify({"error": "Bookings are currently disabled"}), 503
 
     data = request.get_json()
     
@@ -303,58 +1094,41 @@ def bookings():
     room_id = data["room_id"]
     check_in = data["check_in"]
     check_out = data["check_out"]
+    try:
+        lock_room = int(room_id)
+    except (TypeError, ValueError):
+        return jsonify({"error": "room_id must be an integer"}), 400
     
-    # Debug logging
-    print(f"Checking overlap for room {room_id} from {check_in} to {check_out}")
-    
-    # First, get all bookings for this room to understand what we're dealing with
-    all_bookings = db.execute("""
-        SELECT booking_id, booking_status, check_in, check_out 
-        FROM bookings 
-        WHERE room_id = ?
-        ORDER BY booking_id
-    """, (room_id,)).fetchall()
-    
-    print(f"All bookings for room {room_id}: {all_bookings}")
-    
-    # Get active (non-cancelled) bookings that could cause overlap
-    overlapping_bookings = db.execute("""
-        SELECT booking_id, booking_status, check_in, check_out FROM bookings 
-        WHERE room_id = ? 
-        AND booking_status != 'Cancelled'
-        AND (
-            (check_in <= ? AND check_out > ?) OR
-            (check_in < ? AND check_out >= ?) OR
-            (check_in >= ? AND check_out <= ?)
-        )
-    """, (room_id, check_out, check_in, check_out, check_in, check_in, check_out)).fetchall()
-    
-    if overlapping_bookings:
-        print(f"Found overlapping active bookings: {overlapping_bookings}")
-        # Return more detailed error message
-        overlapping_details = []
-        for booking in overlapping_bookings:
-            overlapping_details.append(f"Booking #{booking[0]} ({booking[2]} to {booking[3]})")
-        
-        db.close()
-        return jsonify({
-            "error": "Room already booked for these dates",
-            "details": f"Conflicts with: {', '.join(overlapping_details)}"
-        }), 400
-    else:
-        print("No overlapping active bookings found")
-    
-    db.execute(
-        "INSERT INTO bookings (user_id, room_id, check_in, check_out, booking_status, arrival_status) VALUES (?, ?, ?, ?, ?, ?)",
-        (data["user_id"], data["room_id"], data["check_in"], data["check_out"], data.get("booking_status", "Pending"), data.get("arrival_status", "Not Arrived"))
-    )
-    db.commit()
-    
-    # Get the created booking to return its ID
-    created_booking = db.execute("SELECT * FROM bookings WHERE rowid = last_insert_rowid()").fetchone()
-    db.close()
+    # The check and the insert share one write transaction; requests for the same room
+    # queue on room_locks first so they do not all wait on SQLite's write lock
+    with room_locks.hold(lock_room), booking_write(db, lock_room):
+        # Get active (non-cancelled) bookings that could cause overlap
+        overlapping_bookings = find_overlapping_bookings(db, room_id, check_in, check_out)
+        
+        if overlapping_bookings:
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Booking overlaps", room_id=room_id, check_in=check_in, check_out=check_out,
+                          overlapping=[tuple(b) for b in overlapping_bookings])
+            # Return more detailed error message
+            overlapping_details = []
+            for booking in overlapping_bookings:
+                overlapping_details.append(f"Booking #{booking[0]} ({booking[2]} to {booking[3]})")
+            
+            return jsonify({
+                "error": "Room already booked for these dates",
+                "details": f"Conflicts with: {', '.join(overlapping_details)}"
+            }), 400
+        
+        # RETURNING hands back the created booking, ID included
+        created_booking = db.execute(
+            "INSERT INTO bookings (user_id, room_id, check_in, check_out, booking_status, arrival_status) VALUES (?, ?, ?, ?, ?, ?) RETURNING *",
+            (data["user_id"], data["room_id"], data["check_in"], data["check_out"], data.get("booking_status", "Pending"), data.get("arrival_status", "Not Arrived"))
+        ).fetchone()
+        # Still under the room lock and before commit, so the next request sees it
+        booking_index.add(created_booking["booking_id"], created_booking["room_id"],
+                          created_booking["check_in"], created_booking["check_out"], created_booking["booking_status"])
     
-    print(f"Booking created successfully with ID: {created_booking['booking_id']}")
+    log.info("Booking created", booking_id=created_booking["booking_id"], room_id=created_booking["room_id"])
     return jsonify(dict(created_booking)), 201
 
 @app.route("/bookings/<int:booking_id>", methods=["GET", "PUT", "DELETE"])
@@ -362,7 +1136,6 @@ def booking_detail(booking_id):
     db = get_db()
     if request.method == "GET":
         booking = db.execute("SELECT * FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()
-        db.close()
         if booking:
             return jsonify(dict(booking))
         return jsonify({"error": "Booking not found"}), 404
@@ -370,58 +1143,63 @@ def booking_detail(booking_id):
     elif request.method == "PUT":
         data = request.get_json()
         
-        # Get current booking to preserve existing values
-        current_booking = db.execute("SELECT * FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()
-        if not current_booking:
-            db.close()
+        # Lock the booking's current room and its target room in a fixed order, as POST does
+        located = db.execute("SELECT room_id FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()
+        if not located:
             return jsonify({"error": "Booking not found"}), 404
+        try:
+            lock_rooms = {located["room_id"], int(data.get("room_id", located["room_id"]))}
+        except (TypeError, ValueError):
+            return jsonify({"error": "room_id must be an integer"}), 400
         
-        print(f"Updating booking {booking_id} with data: {data}")
+        with contextlib.ExitStack() as stack:
+            for locked_room in sorted(lock_rooms):
+                stack.enter_context(room_locks.hold(locked_room))
+            touched = stack.enter_context(booking_write(db, *lock_rooms))
+            # Get current booking to preserve existing values
+            current_booking = db.execute("SELECT * FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()
+            if not current_booking:
+                return jsonify({"error": "Booking not found"}), 404
+            touched.add(current_booking["room_id"])
         
-        # Prepare update values, keeping existing values if not provided
-        user_id = data.get("user_id", current_booking["user_id"])
-        room_id = data.get("room_id", current_booking["room_id"])
-        check_in = data.get("check_in", current_booking["check_in"])
-        check_out = data.get("check_out", current_booking["check_out"])
-        booking_status = data.get("booking_status", current_booking["booking_status"])
-        arrival_status = data.get("arrival_status", current_booking["arrival_status"])
-        
-        # If we're changing dates or room, check for overlaps (except when cancelling)
-        if (room_id != current_booking["room_id"] or 
-            check_in != current_booking["check_in"] or 
-            check_out != current_booking["check_out"]) and booking_status != 'Cancelled':
+            # Prepare update values, keeping existing values if not provided
+            user_id = data.get("user_id", current_booking["user_id"])
+            room_id = data.get("room_id", current_booking["room_id"])
+            check_in = data.get("check_in", current_booking["check_in"])
+            check_out = data.get("check_out", current_booking["check_out"])
+            booking_status = data.get("booking_status", current_booking["booking_status"])
+            arrival_status = data.get("arrival_status", current_booking["arrival_status"])
+        
+            # If we're changing dates or room, or reinstating a cancelled booking, check for
+            # overlaps (except when cancelling); ROOM_BOOKED_SQL relies on active bookings
+            # of a room never overlapping
+            if (room_id != current_booking["room_id"] or 
+                check_in != current_booking["check_in"] or 
+                check_out != current_booking["check_out"] or
+                current_booking["booking_status"] == 'Cancelled') and booking_status != 'Cancelled':
             
-            print(f"Checking for overlaps due to date/room change")
-            overlapping_bookings = db.execute("""
-                SELECT booking_id, booking_status, check_in, check_out FROM bookings 
-                WHERE room_id = ? 
-                AND booking_id != ?
-                AND booking_status != 'Cancelled'
-                AND (
-                    (check_in <= ? AND check_out > ?) OR
-                    (check_in < ? AND check_out >= ?) OR
-                    (check_in >= ? AND check_out <= ?)
-                )
-            """, (room_id, booking_id, check_out, check_in, check_out, check_in, check_in, check_out)).fetchall()
+                overlapping_bookings = find_overlapping_bookings(db, room_id, check_in, check_out, exclude_booking_id=booking_id)
             
-            if overlapping_bookings:
-                print(f"Overlap detected: {overlapping_bookings}")
-                db.close()
-                return jsonify({"error": "Room already booked for these dates"}), 400
+                if overlapping_bookings:
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("Booking overlaps", booking_id=booking_id, room_id=room_id, check_in=check_in,
+                                  check_out=check_out, overlapping=[tuple(b) for b in overlapping_bookings])
+                    return jsonify({"error": "Room already booked for these dates"}), 400
         
-        db.execute("""
-            UPDATE bookings SET user_id=?, room_id=?, check_in=?, check_out=?, booking_status=?, arrival_status=? WHERE booking_id=?
-        """, (user_id, room_id, check_in, check_out, booking_status, arrival_status, booking_id))
-        db.commit()
-        db.close()
+            db.execute("""
+                UPDATE bookings SET user_id=?, room_id=?, check_in=?, check_out=?, booking_status=?, arrival_status=? WHERE booking_id=?
+            """, (user_id, room_id, check_in, check_out, booking_status, arrival_status, booking_id))
+            booking_index.sync_booking(db, booking_id)
         
-        print(f"Booking {booking_id} updated successfully")
+        log.info("Booking updated", booking_id=booking_id)
         return jsonify({"message": "Booking updated"})
 
     elif request.method == "DELETE":
-        db.execute("DELETE FROM bookings WHERE booking_id=?", (booking_id,))
-        db.commit()
-        db.close()
+        with booking_write(db) as touched:
+            deleted = db.execute("DELETE FROM bookings WHERE booking_id=? RETURNING room_id", (booking_id,)).fetchone()
+            if deleted:
+                touched.add(deleted["room_id"])
+            booking_index.discard(booking_id)
         return jsonify({"message": "Booking deleted"})
 
 # ================== PAYMENTS ==================
@@ -429,9 +1207,12 @@ def booking_detail(booking_id):
 def payments():
     db = get_db()
     if request.method == "GET":
-        payments = db.execute("SELECT * FROM payments").fetchall()
-        db.close()
-        return jsonify([dict(p) for p in payments])
+        return list_endpoint(db, "SELECT * FROM payments", {
+            "status": "payment_status = :status",
+            "booking_id": "booking_id = :booking_id",
+            "from": "payment_date >= :from",
+            "to": "payment_date < :to",
+        }, ["payment_id"])
 
     data = request.get_json()
     db.execute(
@@ -439,7 +1220,6 @@ def payments():
         (data["booking_id"], data["amount"], data.get("payment_method", "Paytm"), data.get("payment_status", "Pending"))
     )
     db.commit()
-    db.close()
     return jsonify({"message": "Payment added"}), 201
 
 @app.route("/payments/<int:payment_id>", methods=["GET", "PUT", "DELETE"])
@@ -447,7 +1227,6 @@ def payment_detail(payment_id):
     db = get_db()
     if request.method == "GET":
         payment = db.execute("SELECT * FROM payments WHERE payment_id=?", (payment_id,)).fetchone()
-        db.close()
         if payment:
             return jsonify(dict(payment))
         return jsonify({"error": "Payment not found"}), 404
@@ -458,13 +1237,11 @@ def payment_detail(payment_id):
             UPDATE payments SET booking_id=?, amount=?, payment_method=?, payment_status=? WHERE payment_id=?
         """, (data["booking_id"], data["amount"], data.get("payment_method"), data.get("payment_status"), payment_id))
         db.commit()
-        db.close()
         return jsonify({"message": "Payment updated"})
 
     elif request.method == "DELETE":
         db.execute("DELETE FROM payments WHERE payment_id=?", (payment_id,))
         db.commit()
-        db.close()
         return jsonify({"message": "Payment deleted"})
 
 # ================== REVIEWS ==================
@@ -472,14 +1249,17 @@ def payment_detail(payment_id):
 def reviews():
     db = get_db()
     if request.method == "GET":
-        reviews = db.execute("""
+        return list_endpoint(db, """
             SELECT r.*, u.name as user_name, rm.room_number
             FROM reviews r
             JOIN users u ON r.user_id=u.user_id
             JOIN rooms rm ON r.room_id=rm.room_id
-        """).fetchall()
-        db.close()
-        return jsonify([dict(r) for r in reviews])
+        """, {
+            "user_id": "r.user_id = :user_id",
+            "room_id": "r.room_id = :room_id",
+            "from": "r.created_at >= :from",
+            "to": "r.created_at < :to",
+        }, ["r.review_id"])
 
     data = request.get_json()
     db.execute(
@@ -487,31 +1267,29 @@ def reviews():
         (data["user_id"], data["room_id"], data["rating"], data.get("comment"))
     )
     db.commit()
-    db.close()
     return jsonify({"message": "Review added"}), 201
 
 # ================== FEATURES ==================
 @app.route("/features", methods=["GET", "POST"])
+@conditional_get("room_features")
 def features():
     db = get_db()
     if request.method == "GET":
         features = db.execute("SELECT * FROM room_features").fetchall()
-        db.close()
         return jsonify([dict(f) for f in features])
 
     data = request.get_json()
     db.execute("INSERT INTO room_features (feature_name, icon) VALUES (?, ?)", 
                (data["name"], data.get("icon", "fa-star")))
     db.commit()
-    db.close()
     return jsonify({"message": "Feature added"}), 201
 
 @app.route("/features/<int:feature_id>", methods=["GET", "PUT", "DELETE"])
+@conditional_get("room_features")
 def feature_detail(feature_id):
     db = get_db()
     if request.method == "GET":
         feature = db.execute("SELECT * FROM room_features WHERE feature_id=?", (feature_id,)).fetchone()
-        db.close()
         if feature:
             return jsonify(dict(feature))
         return jsonify({"error": "Feature not found"}), 404
@@ -522,37 +1300,315 @@ def feature_detail(feature_id):
             UPDATE room_features SET feature_name=?, icon=? WHERE feature_id=?
         """, (data["name"], data.get("icon", "fa-star"), feature_id))
         db.commit()
-        db.close()
         return jsonify({"message": "Feature updated"})
 
     elif request.method == "DELETE":
         db.execute("DELETE FROM room_features WHERE feature_id=?", (feature_id,))
         db.commit()
-        db.close()
         return jsonify({"message": "Feature deleted"})
 
 # ================== SERVICES ==================
 @app.route("/services", methods=["GET", "POST"])
+@conditional_get("room_services")
 def services():
     db = get_db()
     if request.method == "GET":
         services = db.execute("SELECT * FROM room_services").fetchall()
-        db.close()
         return jsonify([dict(s) for s in services])
 
     data = request.get_json()
     db.execute("INSERT INTO room_services (service_name) VALUES (?)", (data["name"],))
     db.commit()
-    db.close()
     return jsonify({"message": "Service added"}), 201
 
-# ================== SETTINGS ==================
-@app.route("/settings", methods=["GET"])
-def settings():
+# ================== BULK IMPORT ==================
+# POST /<resource>/bulk takes a JSON array (or {"items": [...]}) and inserts every
+# valid item with one executemany() in one write transaction. The response lists a
+# result per item; with ?atomic=true a single invalid item rejects the whole batch.
+BULK_MAX_ITEMS = 5000
+
+def bulk_items():
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list) or not data:
+        return None, (jsonify({"error": "Expected a non-empty JSON array of items"}), 400)
+    if len(data) > BULK_MAX_ITEMS:
+        return None, (jsonify({"error": f"At most {BULK_MAX_ITEMS} items per request"}), 413)
+    return data, None
+
+def require_fields(item, *fields):
+    missing = [f for f in fields if item.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+
+# Values the admin pages and the booking flow understand; bulk rows must use one of them
+ROOM_STATUSES = ("Available", "Occupied", "Maintenance")
+USER_STATUSES = ("active", "banned")
+BOOKING_STATUSES = ("Pending", "Confirmed", "Cancelled")
+ARRIVAL_STATUSES = ("Not Arrived", "Arrived", "Departed")
+
+def choice_field(item, field, allowed, default):
+    """item[field] (default when absent), which must be one of allowed; null is rejected"""
+    value = item.get(field, default)
+    if value not in allowed:
+        raise ValueError(f"{field} must be one of: {', '.join(allowed)}")
+    return value
+
+def build_rows(items, build):
+    """build(item) -> row tuple for every item, or the error message when it is invalid"""
+    rows = []
+    for item in items:
+        if not isinstance(item, dict):
+            rows.append("Item must be a JSON object")
+            continue
+        try:
+            rows.append(build(item))
+        except ValueError as e:
+            rows.append(str(e))
+    return rows
+
+def existing_values(db, table, column, values):
+    """The values already present in table.column, looked up in one query"""
+    rows = db.execute(
+        f"SELECT {column} FROM {table} WHERE {column} IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(values)),)
+    ).fetchall()
+    return {r[0] for r in rows}
+
+def reject_duplicates(db, rows, table, column):
+    """Fail rows whose first value (a UNIQUE column) exists already or repeats an earlier item"""
+    taken = existing_values(db, table, column, [r[0] for r in rows if isinstance(r, tuple)])
+    seen = set()
+    for i, row in enumerate(rows):
+        if not isinstance(row, tuple):
+            continue
+        if row[0] in taken:
+            rows[i] = f"{column} '{row[0]}' already exists"
+        elif row[0] in seen:
+            rows[i] = f"Duplicate {column} '{row[0]}' in this batch"
+        else:
+            seen.add(row[0])
+    return rows
+
+def insert_batch(db, sql, rows):
+    """Run an INSERT for every row and return the new rowids in row order.
+
+    SQLite does not promise consecutive rowids, so each row's lastrowid is read
+    rather than counted back from the last one. The statement is prepared once
+    and reused from the connection's statement cache.
+    """
+    cursor = db.cursor()
+    ids = []
+    for row in rows:
+        cursor.execute(sql, row)
+        ids.append(cursor.lastrowid)
+    return ids
+
+def bulk_write(db, items, tables, prepare, insert_sql, on_insert=None):
+    """Validate and insert a batch; returns the response and the inserted (row, id) pairs.
+
+    prepare(db, items) runs inside the write transaction, so the uniqueness and
+    overlap checks it makes still hold when the rows are inserted. on_insert, if
+    given, receives the (row, id) pairs inside that transaction too, before commit.
+    """
+    atomic = request.args.get("atomic", "").lower() in ("1", "true", "yes")
+    with coherence.tracked_write(db, *tables):
+        rows = prepare(db, items)
+        failed = sum(1 for r in rows if not isinstance(r, tuple))
+        valid = [] if atomic and failed else [r for r in rows if isinstance(r, tuple)]
+        ids = insert_batch(db, insert_sql, valid)
+        if on_insert:
+            on_insert(list(zip(valid, ids)))
+
+    new_ids = iter(ids)
+    results = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, tuple):
+            results.append({"index": index, "status": "error", "error": row})
+        elif atomic and failed:
+            results.append({"index": index, "status": "skipped"})
+        else:
+            results.append({"index": index, "status": "created", "id": next(new_ids)})
+
+    status = 201 if not failed else (207 if ids else 400)
+    body = {"created": len(ids), "failed": failed, "results": results}
+    return (jsonify(body), status), list(zip(valid, ids))
+
+def room_row(item):
+    require_fields(item, "room_number", "room_type", "price")
+    try:
+        price = float(item["price"])
+    except (TypeError, ValueError):
+        raise ValueError("price must be a number")
+    return (str(item["room_number"]), choice_field(item, "room_type", tuple(ROOM_TYPE_CAPACITY), None), price,
+            choice_field(item, "status", ROOM_STATUSES, "Available"),
+            item.get("description"), item.get("image_url"))
+
+def user_row(item):
+    require_fields(item, "name", "email", "password")
+    return (str(item["email"]), item["name"], item["password"], item.get("phone"),
+            choice_field(item, "status", USER_STATUSES, "active"))
+
+def feature_row(item):
+    require_fields(item, "name")
+    return (str(item["name"]), item.get("icon", "fa-star"))
+
+def booking_row(item):
+    require_fields(item, "user_id", "room_id", "check_in", "check_out")
+    try:
+        user_id, room_id = int(item["user_id"]), int(item["room_id"])
+    except (TypeError, ValueError):
+        raise ValueError("user_id and room_id must be integers")
+    try:
+        check_in = date.fromisoformat(str(item["check_in"]))
+        check_out = date.fromisoformat(str(item["check_out"]))
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format")
+    if check_in >= check_out:
+        raise ValueError("check_out must be after check_in")
+    return (user_id, room_id, check_in.isoformat(), check_out.isoformat(),
+            choice_field(item, "booking_status", BOOKING_STATUSES, "Pending"),
+            choice_field(item, "arrival_status", ARRIVAL_STATUSES, "Not Arrived"))
+
+def prepare_bookings(db, items):
+    rows = build_rows(items, booking_row)
+    valid = [r for r in rows if isinstance(r, tuple)]
+    known_users = existing_values(db, "users", "user_id", {r[0] for r in valid})
+    known_rooms = existing_values(db, "rooms", "room_id", {r[1] for r in valid})
+
+    accepted = {}  # room_id -> [(check_in, check_out, item index)] already taken by this batch
+    for i, row in enumerate(rows):
+        if not isinstance(row, tuple):
+            continue
+        user_id, room_id, check_in, check_out, booking_status = row[:5]
+        if user_id not in known_users:
+            rows[i] = f"User {user_id} not found"
+            continue
+        if room_id not in known_rooms:
+            rows[i] = f"Room {room_id} not found"
+            continue
+        if booking_status == "Cancelled":
+            continue
+
+        overlapping = find_overlapping_bookings(db, room_id, check_in, check_out)
+        if overlapping:
+            rows[i] = "Room already booked for these dates. Conflicts with: " + ", ".join(
+                f"Booking #{b[0]} ({b[2]} to {b[3]})" for b in overlapping)
+            continue
+        clash = next((j for start, end, j in accepted.get(room_id, [])
+                      if start < check_out and end > check_in), None)
+        if clash is not None:
+            rows[i] = f"Room already booked for these dates. Conflicts with item {clash} of this batch"
+            continue
+        accepted.setdefault(room_id, []).append((check_in, check_out, i))
+    return rows
+
+@app.route("/rooms/bulk", methods=["POST"])
+def rooms_bulk():
+    items, error = bulk_items()
+    if error:
+        return error
+    response, _ = bulk_write(
+        get_db(), items, ["rooms"],
+        lambda db, items: reject_duplicates(db, build_rows(items, room_row), "rooms", "room_number"),
+        "INSERT INTO rooms (room_number, room_type, price, status, description, image_url) VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    return response
+
+@app.route("/users/bulk", methods=["POST"])
+def users_bulk():
+    items, error = bulk_items()
+    if error:
+        return error
+    response, _ = bulk_write(
+        get_db(), items, [],
+        lambda db, items: reject_duplicates(db, build_rows(items, user_row), "users", "email"),
+        "INSERT INTO users (email, name, password, phone, status) VALUES (?, ?, ?, ?, ?)"
+    )
+    return response
+
+@app.route("/features/bulk", methods=["POST"])
+def features_bulk():
+    items, error = bulk_items()
+    if error:
+        return error
+    response, _ = bulk_write(
+        get_db(), items, ["room_features"],
+        lambda db, items: reject_duplicates(db, build_rows(items, feature_row), "room_features", "feature_name"),
+        "INSERT INTO room_features (feature_name, icon) VALUES (?, ?)"
+    )
+    return response
+
+@app.route("/bookings/bulk", methods=["POST"])
+def bookings_bulk():
+    items, error = bulk_items()
+    if error:
+        return error
     db = get_db()
-    settings = db.execute("SELECT * FROM system_settings").fetchall()
-    db.close()
-    return jsonify([dict(s) for s in settings])
+    if not settings_service.booking_enabled(db):
+        return jsonify({"error": "Bookings are currently disabled"}), 503
+
+    # Index the new rows before the batch commits, as POST /bookings does; if the
+    # commit then fails, the rooms already indexed are dropped and reloaded
+    indexed_rooms = set()
+
+    def index_created(created):
+        for row, booking_id in created:
+            indexed_rooms.add(int(row[1]))
+            booking_index.add(booking_id, row[1], row[2], row[3], row[4])
+
+    try:
+        response, _ = bulk_write(
+            db, items, ["bookings"], prepare_bookings,
+            "INSERT INTO bookings (user_id, room_id, check_in, check_out, booking_status, arrival_status) VALUES (?, ?, ?, ?, ?, ?)",
+            on_insert=index_created
+        )
+    except BaseException:
+        for room_id in indexed_rooms:
+            booking_index.invalidate(room_id)
+        raise
+    return response
+
+# ================== ADMIN ==================
+ADMIN_STATS_TTL = 10  # seconds the dashboard numbers may be stale
+
+# One entry, shared by request threads; concurrent misses wait for a single recompute
+admin_stats_cache = CollapsingTTLCache(ADMIN_STATS_TTL, max_entries=1)
+
+def compute_admin_stats(db):
+    """Dashboard counts and KPIs in one round trip; every filtered count is index-backed"""
+    today = date.today()
+    row = db.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM users) AS total_users,
+            (SELECT COUNT(*) FROM rooms) AS total_rooms,
+            (SELECT COUNT(*) FROM bookings) AS total_bookings,
+            (SELECT COUNT(*) FROM reviews) AS total_reviews,
+            (SELECT COUNT(*) FROM bookings
+                WHERE booking_status IN ('Pending', 'Confirmed') AND check_out >= :today) AS active_bookings,
+            (SELECT COUNT(*) FROM bookings
+                WHERE check_in = :today AND booking_status != 'Cancelled') AS todays_arrivals,
+            (SELECT COUNT(*) FROM payments WHERE payment_status = 'Pending') AS pending_payments,
+            (SELECT COALESCE(SUM(amount), 0) FROM payments
+                WHERE payment_status IN ('Completed', 'Success') AND payment_date >= :month_start) AS revenue_this_month,
+            (SELECT COUNT(*) FROM contact_messages WHERE status = 'unread') AS unread_messages
+    """, {"today": today.isoformat(), "month_start": today.replace(day=1).isoformat()}).fetchone()
+    return dict(row)
+
+@app.route("/admin/stats", methods=["GET"])
+def admin_stats():
+    """Admin dashboard numbers, recomputed at most every ADMIN_STATS_TTL seconds"""
+    stats = admin_stats_cache.get(
+        "stats", lambda: {**compute_admin_stats(get_db()), "generated_at": time.time()}
+    )
+    return jsonify(stats)
+
+@app.route("/admin/sweep-holds", methods=["POST"])
+def sweep_holds():
+    """Cancel stale pending bookings now instead of waiting for the next sweep"""
+    released = hold_sweeper.run_once()
+    return jsonify({"released": released, "hold_minutes": BOOKING_HOLD_MINUTES})
 
 # ================== PASSWORD RESET ==================
 @app.route("/password-reset", methods=["POST"])
@@ -567,7 +1623,6 @@ def password_reset():
     try:
         db = get_db()
         user = db.execute("SELECT * FROM users WHERE email=?", (email,)).fetchone()
-        db.close()
 
         if not user:
             # Don't reveal if email exists or not for security
@@ -579,31 +1634,24 @@ def password_reset():
         # 3. Send email with reset link
 
         # For this demo, we just return success
-        print(f"Password reset requested for user: {email}")
+        log.info("Password reset requested", user_id=user["user_id"])
         return jsonify({"message": "Password reset instructions have been sent to your email."}), 200
 
     except Exception as e:
-        print(f"Password reset error: {e}")
+        log.exception("Password reset failed")
         return jsonify({"error": "Failed to process password reset request"}), 500
 
 # ================== SYSTEM SETTINGS ==================
 @app.route("/settings", methods=["GET", "POST"])
+@conditional_get("system_settings")
 def system_settings():
     db = get_db()
     if request.method == "GET":
-        settings = db.execute("SELECT * FROM system_settings").fetchall()
-        db.close()
-        return jsonify([dict(s) for s in settings])
+        return jsonify(settings_service.all(db))
 
     # POST - update settings
     data = request.get_json()
-    for key, value in data.items():
-        db.execute(
-            "INSERT OR REPLACE INTO system_settings (setting_key, setting_value) VALUES (?, ?)",
-            (key, value)
-        )
-    db.commit()
-    db.close()
+    settings_service.update(db, data)
     return jsonify({"message": "Settings updated"}), 200
 
 # ================== SSLCOMMERZ PAYMENT GATEWAY ==================
@@ -622,14 +1670,15 @@ def initiate_ssl_payment():
         
         # Get booking details to verify
         db = get_db()
+        if settings_service.maintenance_mode(db):
+            return jsonify({"error": "Payments are unavailable during maintenance"}), 503
+        
         booking = db.execute("SELECT * FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()
         if not booking:
-            db.close()
             return jsonify({"error": "Booking not found"}), 404
         
         # Get user details
         user = db.execute("SELECT * FROM users WHERE user_id=?", (booking["user_id"],)).fetchone()
-        db.close()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -648,8 +1697,6 @@ def initiate_ssl_payment():
         
         # PRODUCTION MODE - use real SSLCommerz
         ssl_payload = {
-            "store_id": SSLCOMMERZ_STORE_ID,
-            "store_passwd": SSLCOMMERZ_STORE_PASSWORD,
             "total_amount": float(amount),
             "currency": currency,
             "tran_id": transaction_id,
@@ -675,8 +1722,11 @@ def initiate_ssl_payment():
         }
         
         # Make request to SSLCommerz
-        response = requests.post(f"{SSLCOMMERZ_BASE_URL}/gwprocess/v4/api.php", data=ssl_payload)
-        response_data = response.json()
+        try:
+            response_data = gateway.initiate_session(ssl_payload)
+        except GatewayUnavailable as e:
+            log.warning("SSLCommerz unavailable", error=str(e))
+            return jsonify({"error": "Payment gateway is temporarily unavailable, please try again"}), 503
         
         if response_data.get("status") == "FAILED":
             return jsonify({"error": response_data.get("failedreason", "SSLCommerz payment initiation failed")}), 400
@@ -689,48 +1739,104 @@ def initiate_ssl_payment():
         })
     
     except Exception as e:
-        print(f"SSLCommerz initiation error: {str(e)}")
+        log.exception("SSLCommerz initiation failed")
         return jsonify({"error": "Payment initiation failed"}), 500
 
 
+# Gateway retries and double-submitted simulation pages deliver the same callback
+# more than once; the ledger answers repeats with the first delivery's response
+PAYMENT_CALLBACK_TTL = 7 * 24 * 3600   # seconds a delivery is remembered
+PAYMENT_CALLBACK_CLAIM_TIMEOUT = 60    # seconds before an unfinished delivery may be retried
+
+callback_ledger = CallbackLedger(PAYMENT_CALLBACK_TTL, PAYMENT_CALLBACK_CLAIM_TIMEOUT, begin=write_retry.begin)
+
+def idempotent_callback(view):
+    """Process each (endpoint, tran_id, val_id) delivery once and replay its response"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.form if request.form else (request.get_json(silent=True) or {})
+        tran_id = data.get("tran_id") or data.get("transaction_id")
+        if not tran_id:
+            return view(*args, **kwargs)
+        key = (request.endpoint, tran_id, data.get("val_id") or "")
+
+        db = get_db()
+        stored = callback_ledger.lookup(db, *key) or callback_ledger.claim(db, *key)
+        if stored is IN_PROGRESS:
+            return jsonify({"error": "This payment callback is already being processed"}), 409
+        if stored is not None:
+            response = Response(stored[1], status=stored[0], mimetype="application/json")
+            response.headers["X-Callback-Replayed"] = "true"
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            callback_ledger.release(db, *key)
+            raise
+        if response.status_code >= 500:
+            callback_ledger.release(db, *key)
+        else:
+            callback_ledger.complete(db, *key, response.status_code, response.get_data(as_text=True))
+        return response
+    return wrapper
+
+def record_payment_event(db, booking_id, event, **payment):
+    """Apply a payment event (see payment_state.py) and keep the booking index in step"""
+    with booking_write(db) as touched:
+        outcome = apply_payment_event(db, booking_id, event, **payment)
+        # A completed event can reinstate a cancelled booking; index it before commit
+        touched.add(outcome.room_id)
+        if outcome.booking_status == "Cancelled":
+            booking_index.discard(outcome.booking_id)
+        else:
+            booking_index.add(outcome.booking_id, outcome.room_id, outcome.check_in, outcome.check_out,
+                              outcome.booking_status)
+    log.info("Payment event applied", booking_id=booking_id, event=event,
+             booking_status=outcome.booking_status, payment_recorded=outcome.payment_recorded)
+    return outcome
+
+
+def booking_id_from_tran_id(tran_id):
+    """Booking id in a "BK_<booking_id>_..." transaction id, or None when it has another shape"""
+    parts = (tran_id or "").split("_")
+    if len(parts) < 2 or parts[0] != "BK" or not parts[1].isdigit():
+        return None
+    return int(parts[1])
+
+def payment_amount(value):
+    """A callback's amount as a non-negative float, or None when missing or malformed"""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return amount if amount >= 0 else None
+
 @app.route("/simulate-payment-success", methods=["POST"])
+@idempotent_callback
 def simulate_payment_success():
     """Simulate successful payment for testing"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         booking_id = data.get("booking_id")
-        amount = data.get("amount")
+        amount = payment_amount(data.get("amount"))
         payment_method = data.get("payment_method", "bKash")
         transaction_id = data.get("transaction_id", f"SIM_{int(time.time())}")
         
         if not booking_id:
             return jsonify({"error": "booking_id is required"}), 400
+        if amount is None:
+            return jsonify({"error": "amount must be a non-negative number"}), 400
         
         db = get_db()
-        
-        # Get existing booking
-        booking = db.execute("SELECT * FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()
-        if not booking:
-            db.close()
+        try:
+            outcome = record_payment_event(db, booking_id, "completed", amount=amount,
+                                           payment_method=payment_method, transaction_id=transaction_id)
+        except BookingNotFound:
             return jsonify({"error": "Booking not found"}), 404
         
-        # Update booking status to confirmed
-        db.execute("UPDATE bookings SET booking_status='Confirmed' WHERE booking_id=?", (booking_id,))
-        
-        # Check if payment record already exists
-        existing_payment = db.execute("SELECT * FROM payments WHERE booking_id=?", (booking_id,)).fetchone()
-        if existing_payment:
-            # Update existing payment
-            db.execute("""UPDATE payments SET amount=?, payment_method=?, payment_status='Completed', 
-                        transaction_id=? WHERE booking_id=?""",
-                      (float(amount), payment_method, transaction_id, booking_id))
-        else:
-            # Create new payment record
-            db.execute("INSERT INTO payments (booking_id, amount, payment_method, payment_status, transaction_id) VALUES (?, ?, ?, ?, ?)",
-                      (booking_id, float(amount), payment_method, "Completed", transaction_id))
-        
-        db.commit()
-        db.close()
+        if outcome.booking_status != "Confirmed":
+            return jsonify({"error": "Room is no longer available for these dates; the payment was recorded for a refund"}), 409
         
         return jsonify({
             "status": "success", 
@@ -740,7 +1846,7 @@ def simulate_payment_success():
         })
     
     except Exception as e:
-        print(f"Simulate payment error: {str(e)}")
+        log.exception("Payment simulation failed")
         return jsonify({"error": "Payment simulation failed"}), 500
 
 
@@ -759,76 +1865,59 @@ def cancel_unpaid_booking():
         # Get existing booking
         booking = db.execute("SELECT * FROM bookings WHERE booking_id=?", (booking_id,)).fetchone()
         if not booking:
-            db.close()
             return jsonify({"error": "Booking not found"}), 404
         
         # Only cancel if still pending
         if booking["booking_status"] == "Pending":
-            db.execute("UPDATE bookings SET booking_status='Cancelled' WHERE booking_id=?", (booking_id,))
-            db.commit()
+            with booking_write(db, booking["room_id"]):
+                db.execute("UPDATE bookings SET booking_status='Cancelled' WHERE booking_id=?", (booking_id,))
+                booking_index.discard(booking_id)
         
-        db.close()
         
         return jsonify({"status": "cancelled", "message": "Booking cancelled"})
     
     except Exception as e:
-        print(f"Cancel booking error: {str(e)}")
+        log.exception("Cancelling unpaid booking failed")
         return jsonify({"error": "Failed to cancel booking"}), 500
 
 
 @app.route("/ssl-payment-success", methods=["POST"])
+@idempotent_callback
 def ssl_payment_success():
     """Handle successful SSLCommerz payment callback"""
     try:
         data = request.form  # SSLCommerz sends data as form data
         transaction_id = data.get("tran_id")
-        val_id = data.get("val_id")
-        amount = data.get("amount")
+        amount = payment_amount(data.get("amount"))
         card_type = data.get("card_type")
         
         # Extract booking ID from transaction ID
-        booking_id = None
-        if transaction_id.startswith("BK_"):
-            booking_id = int(transaction_id.split("_")[1])
+        booking_id = booking_id_from_tran_id(transaction_id)
         
         if not booking_id:
             return jsonify({"error": "Invalid transaction ID"}), 400
+        if amount is None:
+            return jsonify({"error": "amount must be a non-negative number"}), 400
         
-        # Update payment status in database
         db = get_db()
-        
-        # Get existing booking
-        booking = db.execute("SELECT * FROM bookings WHERE booking_id= ? ", (booking_id,)).fetchone()
-        if not booking:
-            db.close()
+        try:
+            outcome = record_payment_event(db, booking_id, "completed", amount=amount,
+                                           transaction_id=transaction_id, card_type=card_type)
+        except BookingNotFound:
             return jsonify({"error": "Booking not found"}), 404
         
-        # Update booking status to confirmed
-        db.execute("UPDATE bookings SET booking_status='Confirmed' WHERE booking_id= ? ", (booking_id,))
-        
-        # Check if payment record already exists
-        existing_payment = db.execute("SELECT * FROM payments WHERE booking_id= ? ", (booking_id,)).fetchone()
-        if existing_payment:
-            # Update existing payment
-            db.execute("""UPDATE payments SET amount= ? , payment_method='SSLCommerz', payment_status='Completed', 
-                        transaction_id= ? , card_type= ?  WHERE booking_id= ? """,
-                      (float(amount), val_id, card_type, booking_id))
-        else:
-            # Create new payment record
-            db.execute("INSERT INTO payments (booking_id, amount, payment_method, payment_status, transaction_id, card_type) VALUES ( ? , ? , ? , ? , ? , ? )",
-                      (booking_id, float(amount), "SSLCommerz", "Completed", val_id, card_type))
-        
-        db.commit()
-        db.close()
+        if outcome.booking_status != "Confirmed":
+            return jsonify({"error": "Room is no longer available for these dates; the payment was recorded for a refund"}), 409
         
         return jsonify({"status": "success", "message": "Payment successful and booking confirmed"})
     
     except Exception as e:
-        print(f"SSLCommerz success callback error: {str(e)}")
+        log.exception("SSLCommerz success callback failed")
         return jsonify({"error": "Error processing payment success"}), 500
 
 
 @app.route("/ssl-payment-fail", methods=["POST"])
+@idempotent_callback
 def ssl_payment_fail():
     """Handle failed SSLCommerz payment callback"""
     try:
@@ -837,33 +1926,25 @@ def ssl_payment_fail():
         reason = data.get("reason", "Unknown error")
         
         # Extract booking ID from transaction ID
-        booking_id = None
-        if transaction_id.startswith("BK_"):
-            booking_id = int(transaction_id.split("_")[1])
-        
-        if booking_id:
-            # Update booking status to cancelled due to failed payment
-            db = get_db()
-            db.execute("UPDATE bookings SET booking_status='Cancelled' WHERE booking_id= ? ", (booking_id,))
-            
-            # Update or create payment record
-            existing_payment = db.execute("SELECT * FROM payments WHERE booking_id= ? ", (booking_id,)).fetchone()
-            if existing_payment:
-                db.execute("UPDATE payments SET payment_status='Failed', failure_reason= ?  WHERE booking_id= ? ", (reason, booking_id))
-            else:
-                db.execute("INSERT INTO payments (booking_id, amount, payment_method, payment_status, failure_reason) VALUES (?, 0, 'SSLCommerz', 'Failed', ?)", (booking_id, reason))
-            
-            db.commit()
-            db.close()
+        booking_id = booking_id_from_tran_id(transaction_id)
+        if not booking_id:
+            return jsonify({"error": "Invalid transaction ID"}), 400
+        
+        # Cancels the booking unless it has already been paid for
+        try:
+            record_payment_event(get_db(), booking_id, "failed", failure_reason=reason)
+        except BookingNotFound:
+            return jsonify({"error": "Booking not found"}), 404
         
         return jsonify({"status": "failed", "message": f"Payment failed: {reason}"})
     
     except Exception as e:
-        print(f"SSLCommerz fail callback error: {str(e)}")
+        log.exception("SSLCommerz fail callback failed")
         return jsonify({"error": "Error processing payment failure"}), 500
 
 
 @app.route("/ssl-payment-cancel", methods=["POST"])
+@idempotent_callback
 def ssl_payment_cancel():
     """Handle cancelled SSLCommerz payment callback"""
     try:
@@ -871,50 +1952,56 @@ def ssl_payment_cancel():
         transaction_id = data.get("tran_id")
         
         # Extract booking ID from transaction ID
-        booking_id = None
-        if transaction_id.startswith("BK_"):
-            booking_id = int(transaction_id.split("_")[1])
-        
-        if booking_id:
-            # Update booking status to cancelled
-            db = get_db()
-            db.execute("UPDATE bookings SET booking_status='Cancelled' WHERE booking_id= ? ", (booking_id,))
-            
-            # Update or create payment record
-            existing_payment = db.execute("SELECT * FROM payments WHERE booking_id= ? ", (booking_id,)).fetchone()
-            if existing_payment:
-                db.execute("UPDATE payments SET payment_status='Cancelled' WHERE booking_id= ? ", (booking_id,))
-            else:
-                db.execute("INSERT INTO payments (booking_id, amount, payment_method, payment_status) VALUES (?, 0, 'SSLCommerz', 'Cancelled')", (booking_id,))
-            
-            db.commit()
-            db.close()
+        booking_id = booking_id_from_tran_id(transaction_id)
+        if not booking_id:
+            return jsonify({"error": "Invalid transaction ID"}), 400
+        
+        # Cancels the booking unless it has already been paid for
+        try:
+            record_payment_event(get_db(), booking_id, "cancelled")
+        except BookingNotFound:
+            return jsonify({"error": "Booking not found"}), 404
         
         return jsonify({"status": "cancelled", "message": "Payment cancelled by user"})
     
     except Exception as e:
-        print(f"SSLCommerz cancel callback error: {str(e)}")
+        log.exception("SSLCommerz cancel callback failed")
         return jsonify({"error": "Error processing payment cancellation"}), 500
 
 
+# Once a callback has recorded a final payment state the payments table answers status
+# polls; until then gateway answers are cached and concurrent polls share one call
+LOCAL_FINAL_PAYMENT_STATUS = {"Completed": "VALID", "Success": "VALID", "Failed": "FAILED", "Cancelled": "CANCELLED"}
+GATEWAY_FINAL_STATUSES = {"VALID", "VALIDATED", "FAILED", "CANCELLED", "EXPIRED"}
+PAYMENT_STATUS_TTL = 5         # seconds a pending gateway answer is reused
+PAYMENT_STATUS_FINAL_TTL = 60  # seconds a final gateway answer is reused until the callback lands
+
+payment_status_cache = CollapsingTTLCache(
+    PAYMENT_STATUS_TTL,
+    ttl_for=lambda data: PAYMENT_STATUS_FINAL_TTL if data.get("status") in GATEWAY_FINAL_STATUSES else PAYMENT_STATUS_TTL
+)
+
 @app.route("/get-ssl-payment-status/<transaction_id>")
 def get_ssl_payment_status(transaction_id):
-    """Get payment status from SSLCommerz"""
+    """Get payment status, from the payments table when final, else from SSLCommerz"""
     try:
-        # Prepare query to SSLCommerz
-        query_params = {
-            "store_id": SSLCOMMERZ_STORE_ID,
-            "store_passwd": SSLCOMMERZ_STORE_PASSWORD,
-            "tran_id": transaction_id
-        }
-        
-        response = requests.post(f"{SSLCOMMERZ_BASE_URL}/validator/api/validationserverAPI.php", data=query_params)
-        validation_data = response.json()
-        
+        db = get_db()
+        payment = db.execute("""
+            SELECT booking_id, amount, payment_status, card_type, payment_date FROM payments
+            WHERE transaction_id=?
+        """, (transaction_id,)).fetchone()
+        if payment and payment["payment_status"] in LOCAL_FINAL_PAYMENT_STATUS:
+            return jsonify(dict(payment, status=LOCAL_FINAL_PAYMENT_STATUS[payment["payment_status"]],
+                                tran_id=transaction_id, source="local"))
+
+        validation_data = payment_status_cache.get(transaction_id, lambda: gateway.transaction_status(transaction_id))
         return jsonify(validation_data)
     
+    except GatewayUnavailable as e:
+        log.warning("SSLCommerz unavailable", error=str(e))
+        return jsonify({"error": "Payment gateway is temporarily unavailable, please try again"}), 503
     except Exception as e:
-        print(f"SSLCommerz status check error: {str(e)}")
+        log.exception("SSLCommerz status check failed")
         return jsonify({"error": "Error checking payment status"}), 500
 
 
@@ -923,12 +2010,11 @@ def get_ssl_payment_status(transaction_id):
 def contact_messages():
     db = get_db()
     if request.method == "GET":
-        messages = db.execute("""
-            SELECT * FROM contact_messages 
-            ORDER BY created_at DESC
-        """).fetchall()
-        db.close()
-        return jsonify([dict(m) for m in messages])
+        return list_endpoint(db, "SELECT * FROM contact_messages", {
+            "status": "status = :status",
+            "from": "created_at >= :from",
+            "to": "created_at < :to",
+        }, ["created_at", "message_id"], descending=True)
 
     # POST - create message
     data = request.get_json()
@@ -937,7 +2023,6 @@ def contact_messages():
         (data["name"], data["email"], data.get("phone"), data.get("subject"), data["message"])
     )
     db.commit()
-    db.close()
     return jsonify({"message": "Message sent successfully"}), 201
 
 @app.route("/contact-messages/<int:message_id>", methods=["PUT", "DELETE"])
@@ -951,13 +2036,11 @@ def contact_message_detail(message_id):
             (data.get("status", "read"), message_id)
         )
         db.commit()
-        db.close()
         return jsonify({"message": "Message updated"}), 200
     
     elif request.method == "DELETE":
         db.execute("DELETE FROM contact_messages WHERE message_id=?", (message_id,))
         db.commit()
-        db.close()
         return jsonify({"message": "Message deleted"}), 200
 
 # ================== RUN SERVER ==================
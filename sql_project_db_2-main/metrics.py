@@ -0,0 +1,125 @@
+import bisect
+import threading
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size):
+        self.counts = [0] * size  # per bucket, not cumulative; the last one is +Inf
+        self.sum = 0.0
+
+
+class RequestMetrics:
+    """Per-route request counters and latency histograms, rendered for Prometheus.
+
+    ``observe()`` is called once per request: one bisect and a handful of additions
+    under a lock, so it can stay on in production. Series are keyed by the URL rule
+    (``/bookings/<int:booking_id>``), never the raw path, so their number is bounded
+    by the number of routes. Values are per worker process, like the pool stats.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="hotel"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._requests = {}   # (method, route, status) -> count
+        self._latency = {}    # (method, route) -> _Histogram
+        self._db_time = {}    # (method, route) -> _Histogram
+        self._routes = {}     # (method, route) -> [queries, lock_retries, lock_wait]
+        self._in_flight = 0
+
+    def started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def observe(self, method, route, status, duration, db_time=0.0, queries=0, lock_retries=0, lock_wait=0.0):
+        key = (method, route)
+        latency_bucket = bisect.bisect_left(self.buckets, duration)
+        db_bucket = bisect.bisect_left(self.buckets, db_time)
+        with self._lock:
+            self._in_flight -= 1
+            self._requests[(method, route, status)] = self._requests.get((method, route, status), 0) + 1
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = _Histogram(len(self.buckets) + 1)
+                self._db_time[key] = _Histogram(len(self.buckets) + 1)
+                self._routes[key] = [0, 0, 0.0]
+            latency.counts[latency_bucket] += 1
+            latency.sum += duration
+            db_hist = self._db_time[key]
+            db_hist.counts[db_bucket] += 1
+            db_hist.sum += db_time
+            totals = self._routes[key]
+            totals[0] += queries
+            totals[1] += lock_retries
+            totals[2] += lock_wait
+
+    def render(self, extra=()):
+        """Prometheus text exposition (format 0.0.4).
+
+        ``extra`` is an iterable of (name, type, help, value) for process-wide
+        values such as pool and write-lock counters.
+        """
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {k: (list(h.counts), h.sum) for k, h in self._latency.items()}
+            db_time = {k: (list(h.counts), h.sum) for k, h in self._db_time.items()}
+            routes = {k: list(v) for k, v in self._routes.items()}
+            in_flight = self._in_flight
+
+        p = self.prefix
+        lines = []
+        lines += _header(f"{p}_http_requests_total", "counter", "Requests handled, by route and status code")
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f'{p}_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        lines += self._histogram(f"{p}_http_request_duration_seconds", "Request latency, from before_request to teardown", latency)
+        lines += self._histogram(f"{p}_db_time_seconds", "Time per request spent executing SQL, fetching rows and committing", db_time)
+
+        for index, name, kind, help_text in (
+            (0, "db_queries_total", "counter", "SQL statements executed"),
+            (1, "db_lock_retries_total", "counter", "BEGIN IMMEDIATE retries after a busy database"),
+            (2, "db_lock_wait_seconds_total", "counter", "Time spent acquiring SQLite's write lock"),
+        ):
+            lines += _header(f"{p}_{name}", kind, help_text)
+            for (method, route), totals in sorted(routes.items()):
+                lines.append(f'{p}_{name}{{method="{method}",route="{_escape(route)}"}} {_number(totals[index])}')
+
+        lines += _header(f"{p}_http_requests_in_flight", "gauge", "Requests currently being handled")
+        lines.append(f"{p}_http_requests_in_flight {in_flight}")
+
+        for name, kind, help_text, value in extra:
+            lines += _header(f"{p}_{name}", kind, help_text)
+            lines.append(f"{p}_{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _histogram(self, name, help_text, series):
+        lines = _header(name, "histogram", help_text)
+        bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+        for (method, route), (counts, total) in sorted(series.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {_number(total)}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+def _header(name, kind, help_text):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
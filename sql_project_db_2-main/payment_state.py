@@ -0,0 +1,88 @@
+from collections import namedtuple
+
+
+class BookingNotFound(LookupError):
+    """The payment refers to a booking that does not exist"""
+
+
+# Payment event -> (payment_status to record, booking_status it moves the booking to)
+PAYMENT_EVENTS = {
+    "completed": ("Completed", "Confirmed"),
+    "failed": ("Failed", "Cancelled"),
+    "cancelled": ("Cancelled", "Cancelled"),
+}
+
+# Which bookings each event may move. A completed payment confirms a pending booking,
+# and reinstates a cancelled one only while no other active booking overlaps it (same
+# predicate as main.BOOKING_OVERLAP_SQL). A failed or cancelled payment only cancels
+# a booking that is still pending, never one that has been paid for.
+_BOOKING_GUARDS = {
+    "completed": """
+        booking_status IN ('Pending', 'Confirmed')
+        OR (booking_status = 'Cancelled' AND NOT EXISTS (
+            SELECT 1 FROM bookings b
+            WHERE b.room_id = bookings.room_id
+            AND b.booking_id != bookings.booking_id
+            AND b.booking_status != 'Cancelled'
+            AND b.check_in < bookings.check_out AND b.check_out > bookings.check_in
+        ))
+    """,
+    "failed": "booking_status = 'Pending'",
+    "cancelled": "booking_status = 'Pending'",
+}
+
+_BOOKING_COLUMNS = "booking_id, room_id, check_in, check_out, booking_status"
+
+# payments.booking_id is UNIQUE, so one statement creates or updates the row. A
+# completed payment is final: later failed/cancelled events leave it alone.
+_PAYMENT_UPSERT_SQL = """
+    INSERT INTO payments (booking_id, amount, payment_method, payment_status, transaction_id, card_type, failure_reason)
+    VALUES (:booking_id, :amount, :payment_method, :payment_status, :transaction_id, :card_type, :failure_reason)
+    ON CONFLICT(booking_id) DO UPDATE SET
+        amount = CASE WHEN excluded.payment_status = 'Completed' THEN excluded.amount ELSE payments.amount END,
+        payment_method = CASE WHEN excluded.payment_status = 'Completed' THEN excluded.payment_method ELSE payments.payment_method END,
+        payment_status = excluded.payment_status,
+        transaction_id = COALESCE(excluded.transaction_id, payments.transaction_id),
+        card_type = COALESCE(excluded.card_type, payments.card_type),
+        failure_reason = CASE WHEN excluded.payment_status = 'Completed' THEN NULL
+                              ELSE COALESCE(excluded.failure_reason, payments.failure_reason) END
+    WHERE payments.payment_status != 'Completed' OR excluded.payment_status = 'Completed'
+"""
+
+PaymentOutcome = namedtuple("PaymentOutcome", [
+    "booking_id", "room_id", "check_in", "check_out", "booking_status", "booking_changed", "payment_recorded",
+])
+
+
+def apply_payment_event(db, booking_id, event, amount=0, payment_method="SSLCommerz",
+                        transaction_id=None, card_type=None, failure_reason=None):
+    """Apply a payment event to a booking and its payment row.
+
+    Runs inside the caller's write transaction. The normal path is two statements:
+    a guarded UPDATE ... RETURNING on bookings and an upsert on payments. Only when
+    the booking was not moved is it read again, to tell "not found" from "already in
+    a state this event may not change".
+    """
+    payment_status, booking_status = PAYMENT_EVENTS[event]
+
+    row = db.execute(f"""
+        UPDATE bookings SET booking_status = ?
+        WHERE booking_id = ? AND ({_BOOKING_GUARDS[event]})
+        RETURNING {_BOOKING_COLUMNS}
+    """, (booking_status, booking_id)).fetchone()
+    changed = row is not None
+    if row is None:
+        row = db.execute(f"SELECT {_BOOKING_COLUMNS} FROM bookings WHERE booking_id = ?", (booking_id,)).fetchone()
+        if row is None:
+            raise BookingNotFound(f"Booking {booking_id} not found")
+
+    cursor = db.execute(_PAYMENT_UPSERT_SQL, {
+        "booking_id": booking_id,
+        "amount": amount,
+        "payment_method": payment_method,
+        "payment_status": payment_status,
+        "transaction_id": transaction_id,
+        "card_type": card_type,
+        "failure_reason": failure_reason,
+    })
+    return PaymentOutcome(row[0], row[1], row[2], row[3], row[4], changed, cursor.rowcount > 0)
@@ -0,0 +1,74 @@
+import json
+import os
+import re
+import threading
+import time
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+class ProfileStore:
+    """Directory of profiling captures that keeps only the newest ``keep`` of them.
+
+    A capture is one or more files sharing an id (``<id>.json``, ``<id>.pstats``,
+    ...). Ids start with a timestamp, so sorting them sorts captures by age.
+    """
+
+    def __init__(self, directory, keep=100):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def new_capture(self, name):
+        os.makedirs(self.directory, exist_ok=True)
+        name = _UNSAFE_NAME.sub("_", name).strip("_")[:80]
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}-{name}"
+
+    def path(self, capture_id, suffix):
+        return os.path.join(self.directory, capture_id + suffix)
+
+    def save_json(self, capture_id, data):
+        with open(self.path(capture_id, ".json"), "w") as f:
+            json.dump(data, f, indent=2, default=str)
+
+    def _captures(self):
+        captures = {}
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return captures
+        for file_name in names:
+            captures.setdefault(file_name.split(".", 1)[0], []).append(file_name)
+        return captures
+
+    def prune(self):
+        """Delete every capture older than the newest ``keep``"""
+        with self._lock:
+            captures = self._captures()
+            for capture_id in sorted(captures)[:-self.keep]:
+                for file_name in captures[capture_id]:
+                    try:
+                        os.remove(os.path.join(self.directory, file_name))
+                    except OSError:
+                        pass
+
+    def list(self):
+        """Captures newest first, with their files and the summary from <id>.json"""
+        result = []
+        for capture_id, files in sorted(self._captures().items(), reverse=True):
+            entry = {"id": capture_id, "files": sorted(files)}
+            if capture_id + ".json" in files:
+                try:
+                    with open(self.path(capture_id, ".json")) as f:
+                        entry["summary"] = {k: v for k, v in json.load(f).items() if not isinstance(v, (list, dict))}
+                except (OSError, ValueError):
+                    pass
+            result.append(entry)
+        return result
+
+    def resolve(self, file_name):
+        """Absolute path of a file in the store, or None for anything outside it"""
+        if os.path.basename(file_name) != file_name or file_name.startswith("."):
+            return None
+        path = os.path.join(self.directory, file_name)
+        return os.path.abspath(path) if os.path.isfile(path) else None
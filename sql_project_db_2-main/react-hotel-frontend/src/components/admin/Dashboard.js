@@ -2,7 +2,7 @@ import React, { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import Sidebar from "../common/Sidebar";
 import API from "../../utils/api";
-import { auth } from "../../utils/helpers";
+import { auth, formatCurrency } from "../../utils/helpers";
 import "bootstrap/dist/css/bootstrap.min.css";
 import "../../styles/AdminLayout.css";
 
@@ -14,6 +14,11 @@ function AdminDashboard() {
     totalRooms: 0,
     totalBookings: 0,
     totalReviews: 0,
+    activeBookings: 0,
+    todaysArrivals: 0,
+    pendingPayments: 0,
+    revenueThisMonth: 0,
+    unreadMessages: 0,
   });
   const [loading, setLoading] = useState(true);
 
@@ -27,18 +32,18 @@ function AdminDashboard() {
 
   const fetchStats = async () => {
     try {
-      const [users, rooms, bookings, reviews] = await Promise.all([
-        API.getUsers(),
-        API.getRooms(),
-        API.getBookings(),
-        API.getReviews(),
-      ]);
+      const { data } = await API.getAdminStats();
 
       setStats({
-        totalUsers: users.data.length,
-        totalRooms: rooms.data.length,
-        totalBookings: bookings.data.length,
-        totalReviews: reviews.data.length,
+        totalUsers: data.total_users,
+        totalRooms: data.total_rooms,
+        totalBookings: data.total_bookings,
+        totalReviews: data.total_reviews,
+        activeBookings: data.active_bookings,
+        todaysArrivals: data.todays_arrivals,
+        pendingPayments: data.pending_payments,
+        revenueThisMonth: data.revenue_this_month,
+        unreadMessages: data.unread_messages,
       });
     } catch (err) {
       console.error("Error fetching stats:", err);
@@ -87,6 +92,36 @@ function AdminDashboard() {
                     <h2 className="mb-0">{stats.totalReviews}</h2>
                   </div>
                 </div>
+                <div className="col-md-6 mb-4">
+                  <div className="stat-card bg-secondary text-white p-4 rounded">
+                    <h6 className="opacity-75">Active Bookings</h6>
+                    <h2 className="mb-0">{stats.activeBookings}</h2>
+                  </div>
+                </div>
+                <div className="col-md-6 mb-4">
+                  <div className="stat-card bg-dark text-white p-4 rounded">
+                    <h6 className="opacity-75">Today's Arrivals</h6>
+                    <h2 className="mb-0">{stats.todaysArrivals}</h2>
+                  </div>
+                </div>
+                <div className="col-md-6 mb-4">
+                  <div className="stat-card bg-danger text-white p-4 rounded">
+                    <h6 className="opacity-75">Pending Payments</h6>
+                    <h2 className="mb-0">{stats.pendingPayments}</h2>
+                  </div>
+                </div>
+                <div className="col-md-6 mb-4">
+                  <div className="stat-card bg-success text-white p-4 rounded">
+                    <h6 className="opacity-75">Revenue This Month</h6>
+                    <h2 className="mb-0">{formatCurrency(stats.revenueThisMonth)}</h2>
+                  </div>
+                </div>
+                <div className="col-md-6 mb-4">
+                  <div className="stat-card bg-info text-white p-4 rounded">
+                    <h6 className="opacity-75">Unread Messages</h6>
+                    <h2 className="mb-0">{stats.unreadMessages}</h2>
+                  </div>
+                </div>
               </div>
             )}
           </div>
@@ -15,11 +15,8 @@ function MyBookings() {
 
   const fetchBookings = useCallback(async () => {
     try {
-      const response = await API.getBookings();
-      const userBookings = response.data.filter(
-        (b) => b.user_id === user.user_id
-      );
-      setBookings(userBookings);
+      const response = await API.getUserBookings(user.user_id);
+      setBookings(response.data);
     } catch (err) {
       console.error("Error fetching bookings:", err);
     } finally {
@@ -24,21 +24,14 @@ function MyReviews() {
   const fetchData = async () => {
     try {
       const [reviewsRes, roomsRes, bookingsRes] = await Promise.all([
-        API.getReviews(),
+        API.getUserReviews(user.user_id),
         API.getRooms(),
-        API.getBookings(),
+        API.getUserBookings(user.user_id),
       ]);
 
-      const userReviews = reviewsRes.data.filter(
-        (r) => r.user_id === user.user_id
-      );
-      const userBookings = bookingsRes.data.filter(
-        (b) => b.user_id === user.user_id
-      );
-
-      setReviews(userReviews);
+      setReviews(reviewsRes.data);
       setRooms(roomsRes.data);
-      setBookings(userBookings);
+      setBookings(bookingsRes.data);
     } catch (err) {
       console.error("Error fetching data:", err);
     } finally {
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { useParams, useNavigate } from "react-router-dom";
+import { useParams, useNavigate, useLocation } from "react-router-dom";
 import API from "../../utils/api";
 import { formatCurrency, auth } from "../../utils/helpers";
 import "bootstrap/dist/css/bootstrap.min.css";
@@ -8,29 +8,32 @@ import "../../styles/RoomDetail.css";
 function RoomDetail() {
   const { roomId } = useParams();
   const navigate = useNavigate();
+  const location = useLocation();
   const [room, setRoom] = useState(null);
   const [reviews, setReviews] = useState([]);
-  const [bookings, setBookings] = useState([]);
+  const [available, setAvailable] = useState(null);
   const [loading, setLoading] = useState(true);
   const [bookingData, setBookingData] = useState({
-    checkIn: "",
-    checkOut: "",
+    checkIn: location.state?.checkIn || "",
+    checkOut: location.state?.checkOut || "",
   });
 
   useEffect(() => {
     fetchRoomDetails();
   }, [roomId]);
 
+  useEffect(() => {
+    checkAvailability();
+  }, [roomId, bookingData.checkIn, bookingData.checkOut]);
+
   const fetchRoomDetails = async () => {
     try {
-      const [roomResponse, bookingsResponse, reviewsResponse] = await Promise.all([
+      const [roomResponse, reviewsResponse] = await Promise.all([
         API.getRoom(roomId),
-        API.getBookings(),
         API.getReviews()
       ]);
       
       setRoom(roomResponse.data);
-      setBookings(bookingsResponse.data);
       
       const roomReviews = reviewsResponse.data.filter(
         (r) => r.room_id === parseInt(roomId)
@@ -43,21 +46,20 @@ function RoomDetail() {
     }
   };
 
-  const getUpcomingBookings = () => {
-    const today = new Date().toISOString().split('T')[0];
-    return bookings.filter(booking => 
-      booking.room_id === parseInt(roomId) && 
-      booking.booking_status !== 'Cancelled' &&
-      booking.check_out >= today
-    ).sort((a, b) => new Date(a.check_in) - new Date(b.check_in));
-  };
-
-  const formatBookingDate = (dateString) => {
-    const date = new Date(dateString);
-    return date.toLocaleDateString('en-US', { 
-      month: 'short', 
-      day: 'numeric' 
-    });
+  // Ask the server whether this room is free for the chosen dates
+  const checkAvailability = async () => {
+    const { checkIn, checkOut } = bookingData;
+    if (!checkIn || !checkOut || checkOut <= checkIn) {
+      setAvailable(null);
+      return;
+    }
+    try {
+      const response = await API.getAvailableRooms({ check_in: checkIn, check_out: checkOut });
+      setAvailable(response.data.some((r) => r.room_id === parseInt(roomId)));
+    } catch (err) {
+      console.error("Error checking availability:", err);
+      setAvailable(null);
+    }
   };
 
   const handleBooking = () => {
@@ -72,6 +74,11 @@ function RoomDetail() {
       return;
     }
 
+    if (available === false) {
+      alert("This room is not available for these dates");
+      return;
+    }
+
     navigate("/checkout", {
       state: {
         room,
@@ -143,33 +150,6 @@ function RoomDetail() {
                   <strong>Price:</strong> {formatCurrency(room.price)}/night
                 </li>
               </ul>
-              
-              {/* Upcoming Bookings */}
-              {getUpcomingBookings().length > 0 && (
-                <div className="mt-4">
-                  <h5>Upcoming Bookings</h5>
-                  <div className="list-group">
-                    {getUpcomingBookings().slice(0, 3).map((booking, index) => (
-                      <div key={booking.booking_id} className="list-group-item">
-                        <div className="d-flex justify-content-between align-items-center">
-                          <span>
-                            <i className="fa fa-calendar text-warning"></i>{" "}
-                            Booked {formatBookingDate(booking.check_in)} - {formatBookingDate(booking.check_out)}
-                          </span>
-                          <span className={`badge ${booking.booking_status === 'Confirmed' ? 'bg-success' : 'bg-warning'}`}>
-                            {booking.booking_status}
-                          </span>
-                        </div>
-                      </div>
-                    ))}
-                    {getUpcomingBookings().length > 3 && (
-                      <div className="list-group-item text-muted text-center">
-                        +{getUpcomingBookings().length - 3} more bookings
-                      </div>
-                    )}
-                  </div>
-                </div>
-              )}
             </div>
           </div>
 
@@ -184,11 +164,17 @@ function RoomDetail() {
 
                 <h5 className="mb-3">Book This Room</h5>
 
-                {/* Booking Warning */}
-                {getUpcomingBookings().length > 0 && (
+                {/* Availability for the selected dates */}
+                {available === false && (
                   <div className="alert alert-warning mb-3">
                     <i className="fa fa-exclamation-triangle"></i>{" "}
-                    This room has upcoming bookings. Please check availability before booking.
+                    This room is not available for these dates. Please choose other dates.
+                  </div>
+                )}
+                {available === true && (
+                  <div className="alert alert-success mb-3">
+                    <i className="fa fa-check-circle"></i>{" "}
+                    This room is available for these dates.
                   </div>
                 )}
 
@@ -225,6 +211,7 @@ function RoomDetail() {
                 <button
                   className="btn btn-primary w-100 btn-lg"
                   onClick={handleBooking}
+                  disabled={available === false}
                 >
                   <i className="fa fa-calendar"></i> Proceed to Booking
                 </button>
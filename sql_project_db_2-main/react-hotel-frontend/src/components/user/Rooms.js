@@ -5,33 +5,47 @@ import { formatCurrency } from "../../utils/helpers";
 import "bootstrap/dist/css/bootstrap.min.css";
 import "../../styles/Rooms.css";
 
+const toDateInput = (date) => date.toISOString().split('T')[0];
+
+const defaultFilters = () => {
+  const today = new Date();
+  const tomorrow = new Date(today);
+  tomorrow.setDate(today.getDate() + 1);
+  return {
+    checkIn: toDateInput(today),
+    checkOut: toDateInput(tomorrow),
+    roomType: "",
+    maxPrice: 10000,
+  };
+};
+
 function Rooms() {
-  const [rooms, setRooms] = useState([]);
   const [filteredRooms, setFilteredRooms] = useState([]);
-  const [bookings, setBookings] = useState([]);
   const [loading, setLoading] = useState(true);
-  const [filters, setFilters] = useState({
-    roomType: "",
-    maxPrice: 10000,
-  });
+  const [filters, setFilters] = useState(defaultFilters);
 
   useEffect(() => {
-    fetchRoomsAndBookings();
-  }, []);
+    fetchAvailableRooms(filters);
+  }, [filters]);
 
-  const fetchRoomsAndBookings = async () => {
+  // The server works out which rooms are free for the dates; no bookings are downloaded
+  const fetchAvailableRooms = async (filterObj) => {
+    if (!filterObj.checkIn || !filterObj.checkOut || filterObj.checkOut <= filterObj.checkIn) {
+      setFilteredRooms([]);
+      setLoading(false);
+      return;
+    }
     try {
-      const [roomsResponse, bookingsResponse] = await Promise.all([
-        API.getRooms(),
-        API.getBookings()
-      ]);
-      
-      setRooms(roomsResponse.data);
-      setBookings(bookingsResponse.data);
-      
-      // Filter for available rooms initially
-      const availableRooms = roomsResponse.data.filter(room => room.status === "Available");
-      setFilteredRooms(availableRooms);
+      const params = {
+        check_in: filterObj.checkIn,
+        check_out: filterObj.checkOut,
+        max_price: filterObj.maxPrice,
+      };
+      if (filterObj.roomType) {
+        params.room_type = filterObj.roomType;
+      }
+      const response = await API.getAvailableRooms(params);
+      setFilteredRooms(response.data);
     } catch (err) {
       console.error("Error fetching data:", err);
     } finally {
@@ -39,44 +53,9 @@ function Rooms() {
     }
   };
 
-  const getUpcomingBookings = (roomId) => {
-    const today = new Date().toISOString().split('T')[0];
-    return bookings.filter(booking => 
-      booking.room_id === roomId && 
-      booking.booking_status !== 'Cancelled' &&
-      booking.check_out >= today
-    ).sort((a, b) => new Date(a.check_in) - new Date(b.check_in));
-  };
-
-  const formatBookingDate = (dateString) => {
-    const date = new Date(dateString);
-    return date.toLocaleDateString('en-US', { 
-      month: 'short', 
-      day: 'numeric' 
-    });
-  };
-
   const handleFilterChange = (e) => {
     const { name, value } = e.target;
-    const newFilters = { ...filters, [name]: value };
-    setFilters(newFilters);
-    applyFilters(newFilters);
-  };
-
-  const applyFilters = (filterObj) => {
-    let filtered = rooms.filter(room => room.status === "Available");
-
-    if (filterObj.roomType) {
-      filtered = filtered.filter(
-        (room) => room.room_type === filterObj.roomType
-      );
-    }
-
-    if (filterObj.maxPrice) {
-      filtered = filtered.filter((room) => room.price <= filterObj.maxPrice);
-    }
-
-    setFilteredRooms(filtered);
+    setFilters({ ...filters, [name]: value });
   };
 
   if (loading) {
@@ -111,6 +90,28 @@ function Rooms() {
                   <i className="fa fa-filter"></i> Filters
                 </h5>
 
+                <div className="mb-3">
+                  <label className="form-label">Check-in Date</label>
+                  <input
+                    type="date"
+                    className="form-control"
+                    name="checkIn"
+                    value={filters.checkIn}
+                    onChange={handleFilterChange}
+                  />
+                </div>
+
+                <div className="mb-3">
+                  <label className="form-label">Check-out Date</label>
+                  <input
+                    type="date"
+                    className="form-control"
+                    name="checkOut"
+                    value={filters.checkOut}
+                    onChange={handleFilterChange}
+                  />
+                </div>
+
                 <div className="mb-3">
                   <label className="form-label">Room Type</label>
                   <select
@@ -145,11 +146,7 @@ function Rooms() {
 
                 <button
                   className="btn btn-outline-primary w-100"
-                  onClick={() => {
-                    const defaultFilters = { roomType: "", maxPrice: 10000 };
-                    setFilters(defaultFilters);
-                    applyFilters(defaultFilters);
-                  }}
+                  onClick={() => setFilters(defaultFilters())}
                 >
                   Clear Filters
                 </button>
@@ -162,9 +159,6 @@ function Rooms() {
             {filteredRooms.length > 0 ? (
               <div className="row">
                 {filteredRooms.map((room) => {
-                  const upcomingBookings = getUpcomingBookings(room.room_id);
-                  const nextBooking = upcomingBookings[0];
-                  
                   return (
                     <div key={room.room_id} className="col-md-6 mb-4">
                       <div className="card room-card">
@@ -192,16 +186,7 @@ function Rooms() {
                               {room.room_type}
                             </span>
                           </p>
-                          
-                          {/* Booking Status */}
-                          {nextBooking && (
-                            <div className="mb-2">
-                              <span className="badge bg-warning text-dark">
-                                <i className="fa fa-calendar"></i> Booked {formatBookingDate(nextBooking.check_in)} - {formatBookingDate(nextBooking.check_out)}
-                              </span>
-                            </div>
-                          )}
-                          
+
                           <p className="card-text text-truncate">
                             {room.description}
                           </p>
@@ -212,6 +197,7 @@ function Rooms() {
                             </h4>
                             <Link
                               to={`/room/${room.room_id}`}
+                              state={{ checkIn: filters.checkIn, checkOut: filters.checkOut }}
                               className="btn btn-primary btn-sm"
                             >
                               View Details
@@ -225,8 +211,8 @@ function Rooms() {
               </div>
             ) : (
               <div className="alert alert-info">
-                <i className="fa fa-info-circle"></i> No rooms found matching
-                your filters.
+                <i className="fa fa-info-circle"></i> No rooms available for
+                these dates and filters.
               </div>
             )}
           </div>
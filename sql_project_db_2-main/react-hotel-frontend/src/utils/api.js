@@ -67,10 +67,14 @@ export const API = {
   deleteUser: (id) => apiClient.delete(`/users/${id}`),
   banUser: (id) => apiClient.put(`/users/${id}`, { status: "banned" }),
   unbanUser: (id) => apiClient.put(`/users/${id}`, { status: "active" }),
+  getUserBookings: (id) => apiClient.get(`/users/${id}/bookings`),
+  getUserReviews: (id) => apiClient.get(`/users/${id}/reviews`),
+  getUserSummary: (id) => apiClient.get(`/users/${id}/summary`),
 
   // Rooms
   getRooms: () => apiClient.get("/rooms"),
   getRoom: (id) => apiClient.get(`/rooms/${id}`),
+  getAvailableRooms: (params) => apiClient.get("/rooms/available", { params }),
   createRoom: (data) => apiClient.post("/rooms", data),
   updateRoom: (id, data) => apiClient.put(`/rooms/${id}`, data),
   deleteRoom: (id) => apiClient.delete(`/rooms/${id}`),
@@ -101,6 +105,9 @@ export const API = {
   updateFeature: (id, data) => apiClient.put(`/features/${id}`, data),
   deleteFeature: (id) => apiClient.delete(`/features/${id}`),
 
+  // Admin
+  getAdminStats: () => apiClient.get("/admin/stats"),
+
   // Settings
   getSettings: () => apiClient.get("/settings"),
   updateSettings: (data) => apiClient.post("/settings", data),
@@ -0,0 +1,84 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+
+PROFILE_MODES = ("cpu", "memory")
+
+# tracemalloc traces the whole process, so only one request may use it at a time
+_memory_lock = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile and/or tracemalloc capture around one request.
+
+    ``cpu`` profiles the calling thread with cProfile and saves ``<id>.pstats``
+    (open with ``python -m pstats``). ``memory`` starts tracemalloc for the duration
+    of the request and saves ``<id>.tracemalloc`` (``tracemalloc.Snapshot.load``)
+    with the allocations still alive at the end, plus the peak. Allocations by
+    other threads in that window are included; a second memory capture while one
+    is running is skipped rather than queued.
+    """
+
+    def __init__(self, modes, trigger, top=25, frames=10):
+        self.modes = [m for m in modes if m in PROFILE_MODES]
+        self.trigger = trigger
+        self.top = top
+        self.frames = frames
+        self.notes = []
+        self._cpu = None
+        self._memory = False
+        self._started = None
+
+    def start(self):
+        if "memory" in self.modes:
+            if not tracemalloc.is_tracing() and _memory_lock.acquire(blocking=False):
+                tracemalloc.start(self.frames)
+                self._memory = True
+            else:
+                self.notes.append("memory capture skipped: tracemalloc already in use")
+        if "cpu" in self.modes:
+            self._cpu = cProfile.Profile()
+            try:
+                self._cpu.enable()
+            except ValueError:  # another profiler is active on this thread
+                self._cpu = None
+                self.notes.append("cpu capture skipped: another profiler is active")
+        self._started = time.perf_counter()
+
+    def stop(self, store, capture_id):
+        """Stop profiling and write the capture; returns its summary"""
+        summary = {
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "trigger": self.trigger,
+            "modes": self.modes,
+            "notes": self.notes,
+        }
+        snapshot = None
+        try:
+            if self._cpu is not None:
+                cpu, self._cpu = self._cpu, None
+                cpu.disable()
+                cpu.dump_stats(store.path(capture_id, ".pstats"))
+                out = io.StringIO()
+                pstats.Stats(cpu, stream=out).sort_stats("cumulative").print_stats(self.top)
+                summary["cpu_top"] = out.getvalue().splitlines()
+        finally:
+            # Even if the CPU capture failed, tracemalloc must stop and free the lock,
+            # or every later memory capture in this process is skipped
+            if self._memory:
+                try:
+                    current, peak = tracemalloc.get_traced_memory()
+                    snapshot = tracemalloc.take_snapshot()
+                finally:
+                    tracemalloc.stop()
+                    self._memory = False
+                    _memory_lock.release()
+        if snapshot is not None:
+            snapshot.dump(store.path(capture_id, ".tracemalloc"))
+            summary["memory_peak_kb"] = round(peak / 1024, 1)
+            summary["memory_retained_kb"] = round(current / 1024, 1)
+            summary["memory_top"] = [str(stat) for stat in snapshot.statistics("lineno")[:self.top]]
+        return summary
@@ -1,150 +1,20 @@
-import sqlite3
+"""Demo data for development: the admin and demo user accounts plus a small generated hotel.
 
-conn = sqlite3.connect("hotel_booking.db")
-cursor = conn.cursor()
+Run after create_database.py. Rows come from generate_data.py, which also builds
+databases of any size:
 
-# Enable foreign keys
-cursor.execute("PRAGMA foreign_keys = ON")
+    python seed_data.py             # 20 rooms, 50 users, 400 bookings
+    python seed_data.py --replace   # throw away the current data and seed again
+"""
+import sys
+from datetime import date
 
-# ================= ADMINS =================
-cursor.executemany("""
-INSERT INTO admins (username, password, role)
-VALUES (?, ?, ?)
-""", [
-    ("admin", "admin123", "super_admin"),
-    ("manager", "manager123", "admin")
-])
+from generate_data import generate
 
-# ================= USERS =================
-cursor.executemany("""
-INSERT INTO users (name, email, password, phone, status, role)
-VALUES (?, ?, ?, ?, ?, ?)
-""", [
-    ("Rahim Uddin", "khorsedalam0472@gmail.com", "pass123", "01711111111", "active", "admin"),
-    ("Karim Ahmed", "karim@gmail.com", "pass123", "01822222222", "active", "user"),
-    ("Nusrat Jahan", "nusrat@gmail.com", "pass123", "01933333333", "active", "user"),
-    ("Banned User", "banned@gmail.com", "pass123", "01644444444", "banned", "user")
-])
+try:
+    counts = generate("hotel_booking.db", rooms=20, users=50, bookings=400, seed=42, start=date(2025, 12, 1),
+                      replace="--replace" in sys.argv[1:], log=lambda line: None)
+except FileExistsError as e:
+    sys.exit(f"❌ {e}")
 
-# ================= ROOMS =================
-cursor.executemany("""
-INSERT INTO rooms (room_number, room_type, price, status, description)
-VALUES (?, ?, ?, ?, ?)
-""", [
-    ("101", "Single", 2000, "Available", "Single bed AC room"),
-    ("102", "Double", 3000, "Available", "Double bed AC room"),
-    ("201", "Deluxe", 4500, "Available", "Deluxe room with balcony"),
-    ("202", "Suite", 6500, "Available", "Luxury suite room")
-])
-
-# ================= ROOM FEATURES =================
-cursor.executemany("""
-INSERT INTO room_features (feature_name)
-VALUES (?)
-""", [
-    ("AC",),
-    ("WiFi",),
-    ("TV",),
-    ("Balcony",),
-    ("Mini Fridge",)
-])
-
-# ================= ROOM SERVICES =================
-cursor.executemany("""
-INSERT INTO room_services (service_name)
-VALUES (?)
-""", [
-    ("Breakfast",),
-    ("Laundry",),
-    ("Room Service",),
-    ("Airport Pickup",)
-])
-
-# ================= FEATURE MAPPING =================
-cursor.executemany("""
-INSERT INTO room_feature_map (room_id, feature_id)
-VALUES (?, ?)
-""", [
-    (1, 1), (1, 2), (1, 3),
-    (2, 1), (2, 2), (2, 3),
-    (3, 1), (3, 2), (3, 3), (3, 4),
-    (4, 1), (4, 2), (4, 3), (4, 4), (4, 5)
-])
-
-# ================= SERVICE MAPPING =================
-cursor.executemany("""
-INSERT INTO room_service_map (room_id, service_id)
-VALUES (?, ?)
-""", [
-    (1, 1), (1, 3),
-    (2, 1), (2, 2), (2, 3),
-    (3, 1), (3, 2), (3, 3),
-    (4, 1), (4, 2), (4, 3), (4, 4)
-])
-
-# ================= BOOKINGS =================
-cursor.executemany("""
-INSERT INTO bookings (user_id, room_id, check_in, check_out, booking_status, arrival_status)
-VALUES (?, ?, ?, ?, ?, ?)
-""", [
-    (1, 1, "2026-02-10", "2026-02-12", "Confirmed", "Arrived"),
-    (2, 2, "2026-02-15", "2026-02-18", "Confirmed", "Not Arrived"),
-    (3, 3, "2026-03-01", "2026-03-05", "Pending", "Not Arrived")
-])
-
-# ================= PAYMENTS =================
-cursor.executemany("""
-INSERT INTO payments (booking_id, amount, payment_method, payment_status)
-VALUES (?, ?, ?, ?)
-""", [
-    (1, 4000, "Paytm", "Success"),
-    (2, 9000, "Paytm", "Success"),
-    (3, 18000, "Paytm", "Pending")
-])
-
-# ================= REFUNDS =================
-cursor.executemany("""
-INSERT INTO refunds (payment_id, refund_amount, refund_status)
-VALUES (?, ?, ?)
-""", [
-    (2, 3000, "Completed")
-])
-
-# ================= REVIEWS =================
-cursor.executemany("""
-INSERT INTO reviews (user_id, room_id, rating, comment)
-VALUES (?, ?, ?, ?)
-""", [
-    (1, 1, 5, "Excellent service and clean room"),
-    (2, 2, 4, "Very good experience"),
-    (3, 3, 5, "Luxury stay, highly recommended")
-])
-
-# ================= INVOICES =================
-cursor.executemany("""
-INSERT INTO invoices (booking_id, total_amount)
-VALUES (?, ?)
-""", [
-    (1, 4000),
-    (2, 9000),
-    (3, 18000)
-])
-
-# ================= SYSTEM SETTINGS =================
-cursor.executemany("""
-INSERT INTO system_settings (setting_key, setting_value)
-VALUES (?, ?)
-""", [
-    ("site_status", "online"),
-    ("booking_enabled", "true"),
-    ("maintenance_mode", "false"),
-    ("contact_address_line1", "Sayed Nagar B-Block Society"),
-    ("contact_address_line2", "Panir Pump Road"),
-    ("contact_phone", "01302616903"),
-    ("contact_email", "khorsedalam0472@gmail.com")
-])
-
-conn.commit()
-conn.close()
-
-print("✅ All seed data inserted successfully!")
+print("✅ All seed data inserted successfully! " + ", ".join(f"{table}={n}" for table, n in counts.items()))
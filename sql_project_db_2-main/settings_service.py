@@ -0,0 +1,61 @@
+import threading
+
+TRUE_VALUES = ("true", "1", "yes", "on")
+
+
+class SettingsService:
+    """Read-through cache of the system_settings table.
+
+    The whole table is small, so it is loaded in one query and served from memory
+    until update() or invalidate() drops it. Flags such as booking_enabled are then
+    plain dictionary lookups.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+
+    def load(self, db):
+        rows = db.execute("SELECT setting_key, setting_value FROM system_settings").fetchall()
+        values = {r[0]: r[1] for r in rows}
+        with self._lock:
+            self._values = values
+        return values
+
+    def _cached(self, db):
+        values = self._values
+        if values is None:
+            values = self.load(db)
+        return values
+
+    def all(self, db):
+        """Settings as the [{"setting_key", "setting_value"}] rows the API returns"""
+        return [{"setting_key": k, "setting_value": v} for k, v in self._cached(db).items()]
+
+    def get(self, db, key, default=None):
+        return self._cached(db).get(key, default)
+
+    def get_bool(self, db, key, default=False):
+        value = self.get(db, key)
+        if value is None:
+            return default
+        return str(value).strip().lower() in TRUE_VALUES
+
+    def booking_enabled(self, db):
+        return self.get_bool(db, "booking_enabled", True) and not self.maintenance_mode(db)
+
+    def maintenance_mode(self, db):
+        return self.get_bool(db, "maintenance_mode", False)
+
+    def update(self, db, data):
+        """Upsert every key in one transaction, then drop the cache"""
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO system_settings (setting_key, setting_value) VALUES (?, ?)",
+                list(data.items())
+            )
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
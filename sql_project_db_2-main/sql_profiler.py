@@ -0,0 +1,110 @@
+import re
+import sqlite3
+import time
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def normalize_sql(sql):
+    """Statement shape with literals replaced by ?, so near-identical statements group together"""
+    sql = _LITERALS.sub("?", _SPACE.sub(" ", sql).strip())
+    return _VALUE_LISTS.sub("(?, ...)", sql)
+
+
+class SQLProfiler:
+    """Records every statement one request runs on its connection.
+
+    ``attach()`` installs a sqlite3 trace callback, which sees each statement with
+    its bound values expanded, including COMMIT and statements run by triggers.
+    db_pool.PooledConnection reports how long each execute/fetch/commit took
+    (``timed()``, ``add_time()``), and that time is split over the statements
+    traced during it. ``report()`` groups statements by their normalized shape to
+    flag ones repeated ``repeat_threshold`` times or more (N+1 loops) and runs
+    EXPLAIN QUERY PLAN for statements slower than ``slow_ms``.
+
+    Bound values stay in memory for EXPLAIN; reports only contain normalized SQL.
+    """
+
+    def __init__(self, slow_ms=50, repeat_threshold=3):
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.statements = []  # [expanded sql, milliseconds]
+        self._pending = []
+        self._started = time.perf_counter()
+
+    def attach(self, conn):
+        conn.set_trace_callback(self._pending.append)
+        conn.profiler = self
+
+    def detach(self, conn):
+        conn.set_trace_callback(None)
+        conn.profiler = None
+
+    def timed(self, seconds):
+        """Assign ``seconds`` to the statements traced since the last call; returns the last one's index"""
+        traced = [sql for i, sql in enumerate(self._pending) if i == 0 or sql != self._pending[i - 1]]
+        self._pending.clear()
+        if not traced:
+            return None
+        share = seconds * 1000 / len(traced)
+        self.statements.extend([sql, share] for sql in traced)
+        return len(self.statements) - 1
+
+    def add_time(self, index, seconds):
+        if index is not None:
+            self.statements[index][1] += seconds * 1000
+
+    def report(self, conn=None):
+        """Summary dict; pass the (detached) connection to get query plans for slow statements"""
+        self.timed(0)
+        groups = {}
+        for sql, ms in self.statements:
+            group = groups.setdefault(normalize_sql(sql), [0, 0.0])
+            group[0] += 1
+            group[1] += ms
+
+        slow = []
+        for sql, ms in self.statements:
+            if ms >= self.slow_ms:
+                entry = {"sql": normalize_sql(sql), "ms": round(ms, 3)}
+                if conn is not None:
+                    entry["plan"] = explain(conn, sql)
+                slow.append(entry)
+
+        return {
+            "queries": len(self.statements),
+            "db_ms": round(sum(ms for _, ms in self.statements), 3),
+            "elapsed_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "repeated": [{"sql": sql, "count": count, "total_ms": round(ms, 3)}
+                         for sql, (count, ms) in groups.items() if count >= self.repeat_threshold],
+            "slow": slow,
+            "statements": [{"sql": normalize_sql(sql), "ms": round(ms, 3)} for sql, ms in self.statements],
+        }
+
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN lines for a statement, indented by nesting; [] when it has no plan"""
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # The base class method skips PooledConnection's timing and the trace callback
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql).fetchall()
+    except sqlite3.Error as e:
+        return [f"unavailable: {e}"]
+    depth = {0: 0}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, 0) + 1
+        lines.append("  " * (depth[node_id] - 1) + detail)
+    return lines
+
+
+def summary_header(report):
+    """Compact form of a report for a response header"""
+    return (f"queries={report['queries']}; db_ms={report['db_ms']}; "
+            f"slow={len(report['slow'])}; repeated={len(report['repeated'])}")
+
@@ -0,0 +1,164 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class GatewayError(Exception):
+    """The gateway answered with something we cannot use"""
+
+
+class GatewayUnavailable(GatewayError):
+    """The gateway timed out, refused the connection, or the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fails fast while the gateway is degraded.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and every
+    call is rejected for ``reset_timeout`` seconds. The first call after that is let
+    through as a probe: success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open":
+                self._probing = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    self._stats["opened"] += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, state=self._state(), consecutive_failures=self._failures)
+
+
+class SSLCommerzClient:
+    """SSLCommerz API calls over one shared keep-alive session.
+
+    Every request is bounded by (connect_timeout, read_timeout) so a slow gateway
+    cannot hold a Flask worker. Status lookups are idempotent and are retried with
+    backoff on connection errors, timeouts and 5xx answers; session initiation is
+    not, since a retry could open a second gateway session. All calls go through a
+    CircuitBreaker shared by the whole worker process.
+    """
+
+    INITIATE_PATH = "/gwprocess/v4/api.php"
+    STATUS_PATH = "/validator/api/validationserverAPI.php"
+
+    def __init__(self, base_url, store_id, store_password, connect_timeout=3.05, read_timeout=10,
+                 status_retries=2, retry_backoff=0.25, pool_size=10, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.store_id = store_id
+        self.store_password = store_password
+        self.timeout = (connect_timeout, read_timeout)
+        self.status_retries = status_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "failures": 0, "retries": 0}
+
+    def _credentials(self, data):
+        return dict(data, store_id=self.store_id, store_passwd=self.store_password)
+
+    def _post(self, path, data, retries=0):
+        if not self.breaker.allow():
+            raise GatewayUnavailable("Payment gateway temporarily unavailable")
+
+        # Every allowed call must end in record_success or record_failure, or a half-open
+        # probe that died on an unexpected exception would leave the breaker open for good
+        settled = False
+        try:
+            for attempt in range(retries + 1):
+                with self._lock:
+                    self._stats["requests"] += 1
+                try:
+                    response = self.session.post(self.base_url + path, data=data, timeout=self.timeout)
+                    if response.status_code < 500:
+                        payload = response.json()
+                        settled = True
+                        self.breaker.record_success()
+                        return payload
+                    error = GatewayUnavailable(f"Gateway returned HTTP {response.status_code}")
+                except ValueError:
+                    # A 2xx/4xx that is not JSON is the gateway misbehaving, not being down
+                    settled = True
+                    self.breaker.record_success()
+                    raise GatewayError("Gateway returned a non-JSON response")
+                except requests.RequestException as e:
+                    error = GatewayUnavailable(f"Gateway unreachable: {e}")
+
+                with self._lock:
+                    self._stats["failures"] += 1
+                if attempt < retries:
+                    with self._lock:
+                        self._stats["retries"] += 1
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+        finally:
+            if not settled:
+                self.breaker.record_failure()
+        raise error
+
+    def initiate_session(self, payload):
+        """Create a gateway session; payload is everything except the store credentials"""
+        return self._post(self.INITIATE_PATH, self._credentials(payload))
+
+    def transaction_status(self, transaction_id):
+        """Look a transaction up at the validator API (retried, it has no side effects)"""
+        return self._post(self.STATUS_PATH, self._credentials({"tran_id": transaction_id}),
+                          retries=self.status_retries)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["breaker"] = self.breaker.stats()
+        return stats
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,83 @@
+import threading
+import time
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class CollapsingTTLCache:
+    """Small TTL cache whose misses are collapsed per key.
+
+    While one thread is loading a key, other threads asking for the same key wait
+    for that load instead of starting their own, so many clients polling the same
+    thing cost one upstream call per TTL. Errors are handed to every waiter and
+    are not cached.
+    """
+
+    def __init__(self, ttl, max_entries=1000, ttl_for=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.ttl_for = ttl_for  # optional value -> ttl override
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (expires_at, value)
+        self._flights = {}   # key -> _Flight
+        self._stats = {"hits": 0, "misses": 0, "collapsed": 0}
+
+    def get(self, key, loader):
+        """Cached value for key, calling loader() at most once at a time on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._stats["hits"] += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["collapsed"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            ttl = self.ttl_for(flight.value) if self.ttl_for else self.ttl
+            with self._lock:
+                if ttl > 0:
+                    self._store(key, flight.value, ttl)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key, value, ttl):
+        now = time.monotonic()
+        if len(self._entries) >= self.max_entries:
+            self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (now + ttl, value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))